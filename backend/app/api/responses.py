@@ -0,0 +1,17 @@
+"""Shared API response classes."""
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson.
+
+    datetimes are serialized natively (same ISO format as isoformat()),
+    so handlers can return them as-is.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
@@ -1,28 +1,43 @@
 """GitHub OAuth authentication routes."""
-from fastapi import APIRouter, HTTPException, Request, Response
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.responses import RedirectResponse
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.config import settings
 from app.services.github_oauth import github_oauth_service
 from app.services.crypto_service import crypto_service
-from app.models.database import async_session_maker
+from app.services.redis_service import RedisError, get_redis
+from app.api.routes.repos import get_decrypted_token
+from app.models.database import SessionDep
 from app.models.user import User
 
 router = APIRouter()
 
-# In-memory state storage (use Redis in production)
-oauth_states: dict[str, bool] = {}
+# OAuth states live in Redis so every worker can verify them
+OAUTH_STATE_TTL = 300  # 5 minutes
+
+# Without Redis there is nowhere to keep the CSRF state, so login is refused
+REDIS_UNAVAILABLE = "Login is temporarily unavailable: session store (Redis) unreachable"
+
+
+def _oauth_state_key(state: str) -> str:
+    return f"oauth_state:{state}"
 
 
 @router.get("/github")
-async def github_login(request: Request):
+async def github_login(request: Request, redis: Redis = Depends(get_redis)):
     """Initiate GitHub OAuth flow."""
     auth_url, state = github_oauth_service.get_authorization_url()
 
-    # Store state for CSRF protection
-    oauth_states[state] = True
+    # Store state for CSRF protection (expires if the callback never arrives)
+    try:
+        await redis.set(_oauth_state_key(state), "1", ex=OAUTH_STATE_TTL)
+    except RedisError:
+        raise HTTPException(status_code=503, detail=REDIS_UNAVAILABLE)
 
     return {"auth_url": auth_url, "state": state}
 
@@ -32,14 +47,18 @@ async def github_callback(
     code: str,
     state: str,
     response: Response,
+    db: SessionDep,
+    redis: Redis = Depends(get_redis),
 ):
     """Handle GitHub OAuth callback."""
-    # Verify state for CSRF protection
-    if state not in oauth_states:
+    # Verify state for CSRF protection (atomic check-and-delete)
+    try:
+        valid_state = await redis.getdel(_oauth_state_key(state))
+    except RedisError:
+        raise HTTPException(status_code=503, detail=REDIS_UNAVAILABLE)
+    if not valid_state:
         raise HTTPException(status_code=400, detail="Invalid state parameter")
 
-    del oauth_states[state]
-
     try:
         # Exchange code for token
         access_token = await github_oauth_service.exchange_code_for_token(code)
@@ -48,36 +67,39 @@ async def github_callback(
         github_user = await github_oauth_service.get_user_info(access_token)
 
         # Create or update user in database
-        async with async_session_maker() as session:
-            # Check if user exists
-            result = await session.execute(
-                select(User).where(User.github_id == github_user["id"])
+        # Check if user exists
+        result = await db.execute(
+            select(User).where(User.github_id == github_user["id"]).limit(1)
+        )
+        user = result.scalar_one_or_none()
+
+        encrypted_token = crypto_service.encrypt(access_token)
+
+        if user:
+            # Update existing user
+            user.github_username = github_user["login"]
+            user.github_email = github_user.get("email")
+            user.github_avatar_url = github_user.get("avatar_url")
+            user.github_access_token = encrypted_token
+        else:
+            # Create new user
+            user = User(
+                github_id=github_user["id"],
+                github_username=github_user["login"],
+                github_email=github_user.get("email"),
+                github_avatar_url=github_user.get("avatar_url"),
+                github_access_token=encrypted_token,
             )
-            user = result.scalar_one_or_none()
-
-            encrypted_token = crypto_service.encrypt(access_token)
-
-            if user:
-                # Update existing user
-                user.github_username = github_user["login"]
-                user.github_email = github_user.get("email")
-                user.github_avatar_url = github_user.get("avatar_url")
-                user.github_access_token = encrypted_token
-            else:
-                # Create new user
-                user = User(
-                    github_id=github_user["id"],
-                    github_username=github_user["login"],
-                    github_email=github_user.get("email"),
-                    github_avatar_url=github_user.get("avatar_url"),
-                    github_access_token=encrypted_token,
-                )
-                session.add(user)
-
-            await session.commit()
-            await session.refresh(user)
-
-            user_id = user.id
+            db.add(user)
+
+        await db.commit()
+
+        user_id = user.id
+
+        # Drop any cached copy of the previous token, now that the new one
+        # is committed. The cache is per process: with several workers,
+        # the others can keep serving the old token for up to its TTL.
+        get_decrypted_token.cache_invalidate(user_id)
 
         # Redirect to frontend with user ID (frontend will store in state)
         redirect_url = f"{settings.FRONTEND_URL}/callback?user_id={user_id}"
@@ -88,26 +110,25 @@ async def github_callback(
 
 
 @router.get("/me")
-async def get_current_user(user_id: str):
+async def get_current_user(user_id: str, db: SessionDep):
     """Get current authenticated user."""
-    async with async_session_maker() as session:
-        result = await session.execute(
-            select(User).where(User.id == user_id)
-        )
-        user = result.scalar_one_or_none()
+    user = await db.get(User, user_id)
 
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
 
-        return {
-            "id": user.id,
-            "github_username": user.github_username,
-            "github_email": user.github_email,
-            "github_avatar_url": user.github_avatar_url,
-        }
+    return {
+        "id": user.id,
+        "github_username": user.github_username,
+        "github_email": user.github_email,
+        "github_avatar_url": user.github_avatar_url,
+    }
 
 
 @router.post("/logout")
-async def logout():
+async def logout(user_id: Optional[str] = None):
     """Logout user (frontend clears state)."""
+    if user_id:
+        get_decrypted_token.cache_invalidate(user_id)
+
     return {"message": "Logged out successfully"}
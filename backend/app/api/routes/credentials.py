@@ -1,46 +1,87 @@
 """API routes for managing Claude credentials."""
-import json
-from fastapi import APIRouter, HTTPException, UploadFile, File
+import logging
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from redis.asyncio import Redis
 from sqlalchemy import select
 
-from app.models.database import async_session_maker
+from app.api.responses import ORJSONResponse
+from app.models.database import SessionDep, async_session_maker
 from app.models.claude_credentials import ClaudeCredentials
 from app.services.crypto_service import crypto_service
+from app.services.redis_service import RedisError, get_redis, redis_client
 
 router = APIRouter(prefix="/credentials", tags=["credentials"])
+logger = logging.getLogger(__name__)
+
+# Credentials are looked up on every Claude message, so the encrypted
+# blob is cached briefly in Redis ("" marks a user without credentials)
+CREDENTIALS_CACHE_TTL = 60
+
+# credentials.json files are tiny; reject anything larger
+MAX_CREDENTIALS_SIZE = 1 << 20  # 1 MiB
+UPLOAD_CHUNK_SIZE = 1 << 16  # 64 KiB
+
+
+def _credentials_cache_key(user_id: str) -> str:
+    return f"claude_credentials:{user_id}"
+
+
+async def _invalidate_credentials_cache(redis: Redis, user_id: str):
+    """Drop the cached blob; with Redis down there is nothing to drop."""
+    try:
+        await redis.delete(_credentials_cache_key(user_id))
+    except RedisError:
+        logger.warning("Redis unreachable; cached credentials expire within %ss",
+                       CREDENTIALS_CACHE_TTL)
 
 
 @router.get("/claude")
-async def get_claude_credentials(user_id: str):
+async def get_claude_credentials(user_id: str, db: SessionDep):
     """Check if user has Claude credentials configured."""
-    async with async_session_maker() as session:
-        result = await session.execute(
-            select(ClaudeCredentials).where(ClaudeCredentials.user_id == user_id)
-        )
-        credentials = result.scalar_one_or_none()
+    # Only the timestamps are needed - skip the encrypted blob
+    result = await db.execute(
+        select(
+            ClaudeCredentials.created_at,
+            ClaudeCredentials.updated_at,
+        ).where(ClaudeCredentials.user_id == user_id).limit(1)
+    )
+    credentials = result.first()
 
-        if credentials:
-            return {
-                "has_credentials": True,
-                "created_at": credentials.created_at.isoformat(),
-                "updated_at": credentials.updated_at.isoformat() if credentials.updated_at else None,
-            }
+    if credentials:
+        return ORJSONResponse({
+            "has_credentials": True,
+            "created_at": credentials.created_at,
+            "updated_at": credentials.updated_at,
+        })
 
-        return {"has_credentials": False}
+    return {"has_credentials": False}
 
 
 @router.post("/claude")
-async def upload_claude_credentials(user_id: str, file: UploadFile = File(...)):
+async def upload_claude_credentials(
+    user_id: str,
+    db: SessionDep,
+    file: UploadFile = File(...),
+    redis: Redis = Depends(get_redis),
+):
     """Upload Claude credentials.json file."""
     # Validate file name
     if not file.filename or not file.filename.endswith(".json"):
         raise HTTPException(status_code=400, detail="File must be a .json file")
 
-    # Read and validate JSON content
+    # Read in chunks so oversized uploads are rejected without buffering them
+    content = bytearray()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        content.extend(chunk)
+        if len(content) > MAX_CREDENTIALS_SIZE:
+            raise HTTPException(status_code=413, detail="Credentials file too large")
+
+    # Validate JSON content
     try:
-        content = await file.read()
-        credentials_data = json.loads(content.decode("utf-8"))
-    except json.JSONDecodeError:
+        credentials_data = orjson.loads(content)
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON file")
 
     # Validate credentials structure (basic validation)
@@ -49,47 +90,53 @@ async def upload_claude_credentials(user_id: str, file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Credentials must be a JSON object")
 
     # Encrypt the credentials
-    encrypted_credentials = crypto_service.encrypt(json.dumps(credentials_data))
-
-    async with async_session_maker() as session:
-        # Check if user already has credentials
-        result = await session.execute(
-            select(ClaudeCredentials).where(ClaudeCredentials.user_id == user_id)
+    encrypted_credentials = crypto_service.encrypt(orjson.dumps(credentials_data).decode())
+
+    # Check if user already has credentials
+    result = await db.execute(
+        select(ClaudeCredentials).where(ClaudeCredentials.user_id == user_id).limit(1)
+    )
+    existing = result.scalar_one_or_none()
+
+    if existing:
+        # Update existing credentials
+        existing.credentials_encrypted = encrypted_credentials
+        # Commit before invalidating so readers can't re-cache the old row
+        await db.commit()
+        await _invalidate_credentials_cache(redis, user_id)
+        return {"message": "Credentials updated successfully"}
+    else:
+        # Create new credentials
+        new_credentials = ClaudeCredentials(
+            user_id=user_id,
+            credentials_encrypted=encrypted_credentials,
         )
-        existing = result.scalar_one_or_none()
-
-        if existing:
-            # Update existing credentials
-            existing.credentials_encrypted = encrypted_credentials
-            await session.commit()
-            return {"message": "Credentials updated successfully"}
-        else:
-            # Create new credentials
-            new_credentials = ClaudeCredentials(
-                user_id=user_id,
-                credentials_encrypted=encrypted_credentials,
-            )
-            session.add(new_credentials)
-            await session.commit()
-            return {"message": "Credentials saved successfully"}
+        db.add(new_credentials)
+        await db.commit()
+        await _invalidate_credentials_cache(redis, user_id)
+        return {"message": "Credentials saved successfully"}
 
 
 @router.delete("/claude")
-async def delete_claude_credentials(user_id: str):
+async def delete_claude_credentials(
+    user_id: str,
+    db: SessionDep,
+    redis: Redis = Depends(get_redis),
+):
     """Delete user's Claude credentials."""
-    async with async_session_maker() as session:
-        result = await session.execute(
-            select(ClaudeCredentials).where(ClaudeCredentials.user_id == user_id)
-        )
-        credentials = result.scalar_one_or_none()
+    result = await db.execute(
+        select(ClaudeCredentials).where(ClaudeCredentials.user_id == user_id).limit(1)
+    )
+    credentials = result.scalar_one_or_none()
 
-        if not credentials:
-            raise HTTPException(status_code=404, detail="No credentials found")
+    if not credentials:
+        raise HTTPException(status_code=404, detail="No credentials found")
 
-        await session.delete(credentials)
-        await session.commit()
+    await db.delete(credentials)
+    await db.commit()
+    await _invalidate_credentials_cache(redis, user_id)
 
-        return {"message": "Credentials deleted successfully"}
+    return {"message": "Credentials deleted successfully"}
 
 
 async def get_user_credentials(user_id: str) -> str | None:
@@ -98,13 +145,28 @@ async def get_user_credentials(user_id: str) -> str | None:
     Returns the raw credentials JSON string or None if not found.
     Used internally by claude_service.
     """
-    async with async_session_maker() as session:
-        result = await session.execute(
-            select(ClaudeCredentials).where(ClaudeCredentials.user_id == user_id)
-        )
-        credentials = result.scalar_one_or_none()
+    cache_key = _credentials_cache_key(user_id)
+    try:
+        cached = await redis_client.get(cache_key)
+    except RedisError:
+        cached = None  # Cache unreachable - read the database directly
+
+    if cached is not None:
+        encrypted = cached.decode()
+    else:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(ClaudeCredentials).where(ClaudeCredentials.user_id == user_id).limit(1)
+            )
+            credentials = result.scalar_one_or_none()
+
+        encrypted = credentials.credentials_encrypted if credentials else ""
+        try:
+            await redis_client.set(cache_key, encrypted, ex=CREDENTIALS_CACHE_TTL)
+        except RedisError:
+            pass
 
-        if credentials:
-            return crypto_service.decrypt(credentials.credentials_encrypted)
+    if encrypted:
+        return crypto_service.decrypt(encrypted)
 
-        return None
+    return None
@@ -1,12 +1,19 @@
 """MCP (Model Context Protocol) API routes."""
+from datetime import datetime
 from typing import Optional
-from fastapi import APIRouter, HTTPException, Depends
+
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Response
 from pydantic import BaseModel
 
+from app.api.responses import ORJSONResponse
 from app.services.mcp_service import mcp_service, MCPServerType
 
 router = APIRouter(prefix="/mcp", tags=["mcp"])
 
+# Presets are static - encode them once instead of on every request
+_PRESETS_CACHED = orjson.dumps({"presets": mcp_service.get_preset_servers()})
+
 
 class MCPServerCreate(BaseModel):
     """Request model for creating an MCP server."""
@@ -27,7 +34,7 @@ class MCPServerResponse(BaseModel):
     args: list[str] = []
     env: dict[str, str] = {}
     enabled: bool = True
-    created_at: str
+    created_at: datetime
 
 
 class MCPServerToggle(BaseModel):
@@ -35,25 +42,25 @@ class MCPServerToggle(BaseModel):
     enabled: bool
 
 
+def _to_response(s) -> dict:
+    """Convert an MCP server to the MCPServerResponse shape."""
+    return {
+        "name": s.name,
+        "type": s.type.value,
+        "command": s.command,
+        "url": s.url,
+        "args": s.args,
+        "env": s.env,
+        "enabled": s.enabled,
+        "created_at": s.created_at,
+    }
+
+
 @router.get("/servers")
 async def list_servers(user_id: str):
     """List all MCP servers for a user."""
     servers = mcp_service.list_servers(user_id)
-    return {
-        "servers": [
-            MCPServerResponse(
-                name=s.name,
-                type=s.type.value,
-                command=s.command,
-                url=s.url,
-                args=s.args,
-                env=s.env,
-                enabled=s.enabled,
-                created_at=s.created_at.isoformat(),
-            )
-            for s in servers
-        ]
-    }
+    return ORJSONResponse({"servers": [_to_response(s) for s in servers]})
 
 
 @router.post("/servers")
@@ -92,16 +99,7 @@ async def add_server(user_id: str, server: MCPServerCreate):
 
     return {
         "message": "Server added successfully",
-        "server": MCPServerResponse(
-            name=mcp_server.name,
-            type=mcp_server.type.value,
-            command=mcp_server.command,
-            url=mcp_server.url,
-            args=mcp_server.args,
-            env=mcp_server.env,
-            enabled=mcp_server.enabled,
-            created_at=mcp_server.created_at.isoformat(),
-        )
+        "server": MCPServerResponse(**_to_response(mcp_server))
     }
 
 
@@ -128,22 +126,13 @@ async def get_server(user_id: str, name: str):
     if not server:
         raise HTTPException(status_code=404, detail="Server not found")
 
-    return MCPServerResponse(
-        name=server.name,
-        type=server.type.value,
-        command=server.command,
-        url=server.url,
-        args=server.args,
-        env=server.env,
-        enabled=server.enabled,
-        created_at=server.created_at.isoformat(),
-    )
+    return MCPServerResponse(**_to_response(server))
 
 
 @router.get("/presets")
 async def get_presets():
     """Get list of preset MCP server configurations."""
-    return {"presets": mcp_service.get_preset_servers()}
+    return Response(content=_PRESETS_CACHED, media_type="application/json")
 
 
 @router.get("/config")
@@ -1,18 +1,29 @@
 """Repository management routes."""
-from fastapi import APIRouter, HTTPException
+import asyncio
+import shutil
+from pathlib import Path
+
+import orjson
+from async_lru import alru_cache
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import exists, select
 
 from app.services.github_oauth import github_oauth_service
 from app.services.git_service import git_service
 from app.services.crypto_service import crypto_service
-from app.models.database import async_session_maker
+from app.services.redis_service import RedisError, get_redis
+from app.models.database import SessionDep, async_session_maker
 from app.models.user import User
 from app.models.repository import Repository
 
 router = APIRouter()
 
+GITHUB_REPOS_CACHE_TTL = 60  # Serve cached pages without revalidating
+GITHUB_REPOS_ETAG_TTL = 60 * 60 * 24  # Keep pages + ETags for revalidation
+
 
 class ConnectRepoRequest(BaseModel):
     """Request to connect a repository."""
@@ -22,31 +33,63 @@ class ConnectRepoRequest(BaseModel):
     default_branch: str = "main"
 
 
-@router.get("")
-async def list_github_repos(user_id: str, page: int = 1, per_page: int = 30):
-    """List user's GitHub repositories."""
+@alru_cache(maxsize=1024, ttl=60)
+async def get_decrypted_token(user_id: str) -> str:
+    """
+    Get a user's decrypted GitHub access token.
+
+    Cached per user for a short time so bursts of repo requests skip the
+    user lookup and decryption. Invalidated on login and logout.
+    """
     async with async_session_maker() as session:
-        # Get user
         result = await session.execute(
-            select(User).where(User.id == user_id)
+            select(User.github_access_token).where(User.id == user_id).limit(1)
         )
-        user = result.scalar_one_or_none()
+        encrypted_token = result.scalar_one_or_none()
 
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+    if not encrypted_token:
+        raise HTTPException(status_code=404, detail="User not found")
 
-        # Decrypt access token
-        access_token = crypto_service.decrypt(user.github_access_token)
+    return crypto_service.decrypt(encrypted_token)
+
+
+@router.get("")
+async def list_github_repos(
+    user_id: str,
+    page: int = 1,
+    per_page: int = 30,
+    redis: Redis = Depends(get_redis),
+):
+    """List user's GitHub repositories."""
+    # Pages are served from Redis while fresh, then revalidated with
+    # their ETag (304s don't count against GitHub's rate limit)
+    cache_key = f"ghrepos:{user_id}:{page}:{per_page}"
+    fresh_key = f"{cache_key}:fresh"
+
+    try:
+        cached_raw, fresh = await redis.mget(cache_key, fresh_key)
+    except RedisError:
+        cached_raw = fresh = None  # Cache unreachable - go straight to GitHub
+    cached = orjson.loads(cached_raw) if cached_raw else None
+
+    if cached and fresh:
+        repos = cached["repos"]
+    else:
+        access_token = await get_decrypted_token(user_id)
 
         # Fetch repos from GitHub
-        repos = await github_oauth_service.get_user_repos(
+        github_repos, etag = await github_oauth_service.get_user_repos_conditional(
             access_token=access_token,
             page=page,
             per_page=per_page,
+            etag=cached["etag"] if cached else None,
         )
 
-        return {
-            "repos": [
+        if github_repos is None:
+            # Not modified - keep serving the cached page
+            repos = cached["repos"]
+        else:
+            repos = [
                 {
                     "id": repo["id"],
                     "full_name": repo["full_name"],
@@ -57,158 +100,131 @@ async def list_github_repos(user_id: str, page: int = 1, per_page: int = 30):
                     "private": repo["private"],
                     "updated_at": repo["updated_at"],
                 }
-                for repo in repos
-            ],
-            "page": page,
-            "per_page": per_page,
-        }
+                for repo in github_repos
+            ]
+
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                if github_repos is not None:
+                    pipe.set(
+                        cache_key,
+                        orjson.dumps({"etag": etag, "repos": repos}),
+                        ex=GITHUB_REPOS_ETAG_TTL,
+                    )
+                pipe.set(fresh_key, 1, ex=GITHUB_REPOS_CACHE_TTL)
+                await pipe.execute()
+        except RedisError:
+            pass  # Serve the page uncached
+
+    return {
+        "repos": repos,
+        "page": page,
+        "per_page": per_page,
+    }
 
 
 @router.get("/connected")
-async def list_connected_repos(user_id: str):
+async def list_connected_repos(user_id: str, db: SessionDep):
     """List repositories connected to AI Admin."""
-    async with async_session_maker() as session:
-        result = await session.execute(
-            select(Repository).where(Repository.user_id == user_id)
-        )
-        repos = result.scalars().all()
+    # Read-only listing: select plain columns instead of hydrating ORM objects
+    result = await db.execute(
+        select(
+            Repository.id,
+            Repository.github_repo_id,
+            Repository.full_name,
+            Repository.local_path,
+            Repository.default_branch,
+            Repository.vercel_project_id,
+        ).where(Repository.user_id == user_id)
+    )
 
-        return {
-            "repos": [
-                {
-                    "id": repo.id,
-                    "github_repo_id": repo.github_repo_id,
-                    "full_name": repo.full_name,
-                    "local_path": repo.local_path,
-                    "default_branch": repo.default_branch,
-                    "vercel_project_id": repo.vercel_project_id,
-                }
-                for repo in repos
-            ]
-        }
+    return {"repos": [row._asdict() for row in result.all()]}
 
 
 @router.post("/connect")
-async def connect_repository(user_id: str, request: ConnectRepoRequest):
+async def connect_repository(user_id: str, request: ConnectRepoRequest, db: SessionDep):
     """Connect and clone a repository."""
-    async with async_session_maker() as session:
-        # Get user
-        result = await session.execute(
-            select(User).where(User.id == user_id)
-        )
-        user = result.scalar_one_or_none()
-
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        # Check if already connected
-        result = await session.execute(
-            select(Repository).where(
-                Repository.user_id == user_id,
-                Repository.github_repo_id == request.github_repo_id
-            )
-        )
-        existing = result.scalar_one_or_none()
+    access_token = await get_decrypted_token(user_id)
 
-        if existing:
-            raise HTTPException(status_code=400, detail="Repository already connected")
+    # Check if already connected
+    result = await db.execute(
+        select(exists().where(
+            Repository.user_id == user_id,
+            Repository.github_repo_id == request.github_repo_id
+        ))
+    )
 
-        # Decrypt access token
-        access_token = crypto_service.decrypt(user.github_access_token)
+    if result.scalar():
+        raise HTTPException(status_code=400, detail="Repository already connected")
 
-        # Clone repository
-        repo_name = f"{user_id}_{request.full_name.replace('/', '_')}"
+    # Clone repository
+    repo_name = f"{user_id}_{request.full_name.replace('/', '_')}"
 
-        try:
-            local_path = await git_service.clone_repository(
-                clone_url=request.clone_url,
-                repo_name=repo_name,
-                access_token=access_token,
-                branch=request.default_branch,
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to clone: {str(e)}")
-
-        # Create repository record
-        repo = Repository(
-            user_id=user_id,
-            github_repo_id=request.github_repo_id,
-            full_name=request.full_name,
+    try:
+        local_path = await git_service.clone_repository(
             clone_url=request.clone_url,
-            local_path=str(local_path),
-            default_branch=request.default_branch,
+            repo_name=repo_name,
+            access_token=access_token,
+            branch=request.default_branch,
         )
-        session.add(repo)
-        await session.commit()
-        await session.refresh(repo)
-
-        return {
-            "id": repo.id,
-            "full_name": repo.full_name,
-            "local_path": repo.local_path,
-            "message": "Repository connected successfully",
-        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to clone: {str(e)}")
+
+    # Create repository record
+    repo = Repository(
+        user_id=user_id,
+        github_repo_id=request.github_repo_id,
+        full_name=request.full_name,
+        clone_url=request.clone_url,
+        local_path=str(local_path),
+        default_branch=request.default_branch,
+    )
+    db.add(repo)
+    await db.flush()
+
+    return {
+        "id": repo.id,
+        "full_name": repo.full_name,
+        "local_path": repo.local_path,
+        "message": "Repository connected successfully",
+    }
 
 
 @router.delete("/{repo_id}")
-async def disconnect_repository(user_id: str, repo_id: str):
+async def disconnect_repository(user_id: str, repo_id: str, db: SessionDep):
     """Disconnect a repository."""
-    async with async_session_maker() as session:
-        result = await session.execute(
-            select(Repository).where(
-                Repository.id == repo_id,
-                Repository.user_id == user_id
-            )
-        )
-        repo = result.scalar_one_or_none()
+    repo = await db.get(Repository, repo_id)
 
-        if not repo:
-            raise HTTPException(status_code=404, detail="Repository not found")
+    if not repo or repo.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Repository not found")
 
-        # Optionally delete local clone
-        import shutil
-        from pathlib import Path
-        local_path = Path(repo.local_path)
-        if local_path.exists():
-            shutil.rmtree(local_path)
+    # Optionally delete local clone (in a thread - large trees block the loop)
+    local_path = Path(repo.local_path)
+    if local_path.exists():
+        await asyncio.to_thread(shutil.rmtree, local_path, ignore_errors=True)
 
-        await session.delete(repo)
-        await session.commit()
+    await db.delete(repo)
 
-        return {"message": "Repository disconnected"}
+    return {"message": "Repository disconnected"}
 
 
 @router.post("/{repo_id}/sync")
-async def sync_repository(user_id: str, repo_id: str):
+async def sync_repository(user_id: str, repo_id: str, db: SessionDep):
     """Pull latest changes for a repository."""
-    async with async_session_maker() as session:
-        # Get repo
-        result = await session.execute(
-            select(Repository).where(
-                Repository.id == repo_id,
-                Repository.user_id == user_id
-            )
-        )
-        repo = result.scalar_one_or_none()
-
-        if not repo:
-            raise HTTPException(status_code=404, detail="Repository not found")
+    access_token = await get_decrypted_token(user_id)
 
-        # Get user for access token
-        result = await session.execute(
-            select(User).where(User.id == user_id)
-        )
-        user = result.scalar_one_or_none()
+    # Get repo
+    repo = await db.get(Repository, repo_id)
 
-        access_token = crypto_service.decrypt(user.github_access_token)
+    if not repo or repo.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Repository not found")
 
-        try:
-            from pathlib import Path
-            await git_service.pull_latest(
-                local_path=Path(repo.local_path),
-                access_token=access_token,
-                branch=repo.default_branch,
-            )
-            return {"message": "Repository synced successfully"}
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
+    try:
+        await git_service.pull_latest(
+            local_path=Path(repo.local_path),
+            access_token=access_token,
+            branch=repo.default_branch,
+        )
+        return {"message": "Repository synced successfully"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
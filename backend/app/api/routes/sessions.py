@@ -2,10 +2,10 @@
 import uuid
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from sqlalchemy import select
 
+from app.api.responses import ORJSONResponse
 from app.services.claude_service import claude_service
-from app.models.database import async_session_maker
+from app.models.database import SessionDep
 from app.models.user import User
 from app.models.repository import Repository
 
@@ -18,52 +18,42 @@ class CreateSessionRequest(BaseModel):
 
 
 @router.post("")
-async def create_session(user_id: str, request: CreateSessionRequest):
+async def create_session(user_id: str, request: CreateSessionRequest, db: SessionDep):
     """
     Create a new Claude Code session.
 
     Uses the server's Claude authentication (from `claude login`).
     """
-    async with async_session_maker() as db:
-        # Verify user exists
-        result = await db.execute(
-            select(User).where(User.id == user_id)
-        )
-        user = result.scalar_one_or_none()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        # Verify repository exists
-        result = await db.execute(
-            select(Repository).where(
-                Repository.id == request.repo_id,
-                Repository.user_id == user_id
-            )
+    # Verify user exists
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Verify repository exists
+    repo = await db.get(Repository, request.repo_id)
+    if not repo or repo.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Repository not found")
+
+    # Create session (uses server's Claude credentials via CLI)
+    try:
+        session_id = str(uuid.uuid4())
+        session = await claude_service.create_session(
+            session_id=session_id,
+            user_id=user_id,
+            repo_id=request.repo_id,
+            working_dir=repo.local_path,
         )
-        repo = result.scalar_one_or_none()
-        if not repo:
-            raise HTTPException(status_code=404, detail="Repository not found")
-
-        # Create session (uses server's Claude credentials via CLI)
-        try:
-            session_id = str(uuid.uuid4())
-            session = await claude_service.create_session(
-                session_id=session_id,
-                user_id=user_id,
-                repo_id=request.repo_id,
-                working_dir=repo.local_path,
-            )
-
-            return {
-                "session_id": session.session_id,
-                "repo_id": session.repo_id,
-                "repo_path": session.working_dir,
-                "status": "active" if session.is_active else "inactive",
-                "created_at": session.created_at.isoformat(),
-            }
 
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to create session: {str(e)}")
+        return {
+            "session_id": session.session_id,
+            "repo_id": session.repo_id,
+            "repo_path": session.working_dir,
+            "status": "active" if session.is_active else "inactive",
+            "created_at": session.created_at_iso,
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create session: {str(e)}")
 
 
 @router.get("")
@@ -71,17 +61,17 @@ async def list_sessions(user_id: str):
     """List active sessions for a user."""
     sessions = await claude_service.list_sessions(user_id)
 
-    return {
+    return ORJSONResponse({
         "sessions": [
             {
                 "id": s.session_id,
                 "repo_id": s.repo_id,
                 "status": "active" if s.is_active else "inactive",
-                "created_at": s.created_at.isoformat(),
+                "created_at": s.created_at,
             }
             for s in sessions
         ]
-    }
+    })
 
 
 @router.get("/{session_id}")
@@ -100,7 +90,7 @@ async def get_session(user_id: str, session_id: str):
         "repo_id": session.repo_id,
         "repo_path": session.working_dir,
         "status": "active" if session.is_active else "inactive",
-        "created_at": session.created_at.isoformat(),
+        "created_at": session.created_at_iso,
         "is_alive": session.is_active,
         "message_count": session.message_count,
     }
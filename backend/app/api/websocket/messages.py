@@ -0,0 +1,94 @@
+"""Typed frames exchanged over the chat WebSocket."""
+from typing import Any, Optional
+
+import msgspec
+
+
+# Server -> client
+
+class Connected(msgspec.Struct, tag_field="type", tag="connected"):
+    """Sent once after the socket is accepted."""
+    session_id: str
+    working_dir: str
+
+
+class Pong(msgspec.Struct, tag_field="type", tag="pong"):
+    """Reply to a client ping."""
+
+
+class Typing(msgspec.Struct, tag_field="type", tag="typing"):
+    """Typing indicator on/off."""
+    status: bool
+
+
+class TextDelta(msgspec.Struct, tag_field="type", tag="text_delta"):
+    """Incremental text from a streaming response."""
+    content: str
+
+
+class ToolUse(msgspec.Struct, tag_field="type", tag="tool_use"):
+    """Tool call started or finished."""
+    status: str  # "running" or "completed"
+    tool_id: Optional[str] = None
+    tool_name: Optional[str] = None
+
+
+class Response(msgspec.Struct, tag_field="type", tag="response", omit_defaults=True):
+    """Complete assistant response."""
+    content: str
+    tool_uses: Optional[list[dict[str, Any]]] = None
+
+
+class Error(msgspec.Struct, tag_field="type", tag="error"):
+    """Error shown to the user."""
+    content: str
+
+
+class CommandResult(msgspec.Struct, tag_field="type", tag="command_result"):
+    """Successful slash command output."""
+    command: str
+    content: str
+    data: Any = None
+    success: bool = True
+
+
+class CommandError(msgspec.Struct, tag_field="type", tag="command_error"):
+    """Failed slash command."""
+    command: str
+    error: str
+
+
+# Client -> server
+
+class UserMessage(msgspec.Struct, tag_field="type", tag="message"):
+    """Chat message for Claude."""
+    content: str = ""
+    mode: str = "normal"
+    streaming: Optional[bool] = None  # None means the connection default
+
+
+class Command(msgspec.Struct, tag_field="type", tag="command"):
+    """Slash command."""
+    command: str = ""
+    args: list[str] = []
+
+
+class PermissionResponse(msgspec.Struct, tag_field="type", tag="permission_response"):
+    """User's answer to a permission_request."""
+    request_id: Optional[str] = None
+    allowed: bool = False
+    scope: str = "once"
+
+
+class Ping(msgspec.Struct, tag_field="type", tag="ping"):
+    """Keepalive."""
+
+
+ClientMessage = UserMessage | Command | PermissionResponse | Ping
+
+
+# Shared codecs - reusing them avoids re-allocating internal buffers
+ENCODER = msgspec.json.Encoder()
+DECODER = msgspec.json.Decoder(ClientMessage)
+MSGPACK_ENCODER = msgspec.msgpack.Encoder()
+MSGPACK_DECODER = msgspec.msgpack.Decoder(ClientMessage)
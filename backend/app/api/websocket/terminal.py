@@ -1,76 +1,218 @@
 """WebSocket endpoint for Claude chat."""
-import json
+import asyncio
+import logging
+from typing import Optional
+
+import anyio.to_thread
+import msgspec
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
+from app.api.websocket.messages import (
+    DECODER,
+    ENCODER,
+    MSGPACK_DECODER,
+    MSGPACK_ENCODER,
+    Command,
+    CommandError,
+    CommandResult,
+    Connected,
+    Error,
+    PermissionResponse,
+    Ping,
+    Pong,
+    Response,
+    TextDelta,
+    ToolUse,
+    Typing,
+    UserMessage,
+)
 from app.services.claude_service import claude_service
 from app.services.permission_service import permission_service, PermissionScope
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+SEND_QUEUE_SIZE = 1024  # Max frames buffered per connection
+SEND_BATCH_WINDOW = 0.020  # Seconds to coalesce consecutive text deltas
+SEND_BATCH_MAX_CHARS = 16 * 1024  # Flush coalesced text early past this size
+LARGE_FRAME_CHARS = 64 * 1024  # Encode responses past this size off the event loop
+
+# Clients that offer this subprotocol get msgpack binary frames instead of JSON
+MSGPACK_SUBPROTOCOL = "msgpack"
+
+# A typed message, a plain dict (e.g. permission events), or a pre-encoded
+# frame (str for JSON, bytes for msgpack)
+Frame = msgspec.Struct | dict | str | bytes
+
+# Pre-encoded frames for hot paths, per wire format
+_STATIC_FRAMES = {
+    "pong": Pong(),
+    "typing_on": Typing(status=True),
+    "typing_off": Typing(status=False),
+}
+JSON_FRAMES = {name: ENCODER.encode(msg).decode() for name, msg in _STATIC_FRAMES.items()}
+MSGPACK_FRAMES = {name: MSGPACK_ENCODER.encode(msg) for name, msg in _STATIC_FRAMES.items()}
+
+_SCOPE_MAP = {
+    "once": PermissionScope.ONCE,
+    "session": PermissionScope.SESSION,
+    "always": PermissionScope.ALWAYS,
+}
+
+
+def encode_frame(payload: Frame, binary: bool = False) -> str | bytes:
+    """Encode a frame: JSON text, or msgpack bytes for binary connections."""
+    if isinstance(payload, (str, bytes)):
+        return payload
+    if binary:
+        return MSGPACK_ENCODER.encode(payload)
+    return ENCODER.encode(payload).decode()
+
+
+async def send_fast(websocket: WebSocket, payload: Frame, binary: bool = False):
+    """
+    Send a frame encoded with msgspec.
+
+    JSON goes out as text frames (the web client JSON.parses event.data);
+    msgpack, for clients that negotiated it, as binary frames.
+    """
+    payload = encode_frame(payload, binary)
+    if isinstance(payload, str):
+        await websocket.send_text(payload)
+    else:
+        await websocket.send_bytes(payload)
 
 
 class ChatConnection:
     """Manages a single WebSocket chat connection."""
 
-    def __init__(self, websocket: WebSocket, session_id: str):
+    def __init__(self, websocket: WebSocket, session_id: str, binary: bool = False):
         self.websocket = websocket
         self.session_id = session_id
+        self.binary = binary  # msgpack instead of JSON
+        self._frames = MSGPACK_FRAMES if binary else JSON_FRAMES
+        self._decoder = MSGPACK_DECODER if binary else DECODER
+        self._handlers = {
+            UserMessage: self._handle_user_message,
+            Command: self._handle_command,
+            PermissionResponse: self._handle_permission_response,
+            Ping: self._handle_ping,
+        }
         self.use_streaming = True  # Use streaming by default
+        self._out_queue: asyncio.Queue[Frame] = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self._writer_task: Optional[asyncio.Task] = None
+        self.closed = False  # Set once the socket is gone; later frames are dropped
+        self._delta_buf: list[str] = []
+        self._delta_size = 0
+
+    async def _send(self, payload: Frame):
+        """Queue a frame for the writer task."""
+        if self.closed:
+            return
+        await self._out_queue.put(payload)
+
+    async def _write(self, payload: Frame):
+        """Write a frame straight to the socket."""
+        await send_fast(self.websocket, payload, self.binary)
+
+    async def _flush_deltas(self):
+        """Send buffered text deltas as a single text_delta frame."""
+        if not self._delta_buf:
+            return
+        content = "".join(self._delta_buf)
+        self._delta_buf.clear()
+        self._delta_size = 0
+        await self._write(TextDelta(content=content))
+
+    async def _writer(self):
+        """
+        Drain the send queue to the socket.
+
+        Consecutive text_delta frames are buffered for up to
+        SEND_BATCH_WINDOW (or SEND_BATCH_MAX_CHARS) and sent as one frame,
+        so fast token streams cost far fewer writes. Any other frame flushes
+        the buffer first to keep ordering.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = 0.0
 
-    async def send_response(self, response: str):
-        """Send Claude response to WebSocket client."""
         try:
-            await self.websocket.send_json({
-                "type": "response",
-                "content": response
-            })
+            while True:
+                if not self._delta_buf:
+                    payload = await self._out_queue.get()
+                else:
+                    try:
+                        payload = await asyncio.wait_for(
+                            self._out_queue.get(),
+                            timeout=max(deadline - loop.time(), 0),
+                        )
+                    except asyncio.TimeoutError:
+                        await self._flush_deltas()
+                        continue
+
+                if isinstance(payload, TextDelta):
+                    if not self._delta_buf:
+                        deadline = loop.time() + SEND_BATCH_WINDOW
+                    self._delta_buf.append(payload.content)
+                    self._delta_size += len(payload.content)
+                    if self._delta_size >= SEND_BATCH_MAX_CHARS:
+                        await self._flush_deltas()
+                    continue
+
+                await self._flush_deltas()
+                await self._write(payload)
         except Exception:
+            # Socket closed - the receive loop will notice and clean up
             pass
+        finally:
+            # Later frames are dropped; emptying the queue wakes any producer
+            # blocked in put() on a full queue so it doesn't hang
+            self.closed = True
+            while not self._out_queue.empty():
+                self._out_queue.get_nowait()
+
+    async def send_response(self, response: str):
+        """Send Claude response to WebSocket client."""
+        await self._send(Response(content=response))
 
     async def send_event(self, event: dict):
         """Send a streaming event to WebSocket client."""
-        try:
-            await self.websocket.send_json(event)
-        except Exception:
-            pass
+        await self._send(event)
 
     async def handle_stream_event(self, event: dict):
         """Handle streaming events from Claude and forward to client."""
         event_type = event.get("type")
 
         if event_type == "text_delta":
-            await self.websocket.send_json({
-                "type": "text_delta",
-                "content": event.get("content", ""),
-            })
+            await self._send(TextDelta(content=event.get("content", "")))
 
         elif event_type == "tool_use_start":
-            await self.websocket.send_json({
-                "type": "tool_use",
-                "status": "running",
-                "tool_id": event.get("tool_id"),
-                "tool_name": event.get("tool_name"),
-            })
+            await self._send(ToolUse(
+                status="running",
+                tool_id=event.get("tool_id"),
+                tool_name=event.get("tool_name"),
+            ))
 
         elif event_type == "tool_use_end":
-            await self.websocket.send_json({
-                "type": "tool_use",
-                "status": "completed",
-                "tool_id": event.get("tool_id"),
-                "tool_name": event.get("tool_name"),
-            })
+            await self._send(ToolUse(
+                status="completed",
+                tool_id=event.get("tool_id"),
+                tool_name=event.get("tool_name"),
+            ))
 
         elif event_type == "complete":
-            await self.websocket.send_json({
-                "type": "response",
-                "content": event.get("content", ""),
-                "tool_uses": event.get("tool_uses", []),
-            })
+            frame = Response(
+                content=event.get("content", ""),
+                tool_uses=event.get("tool_uses", []),
+            )
+            # Long completions are encoded on a worker thread so the loop
+            # keeps serving other connections meanwhile
+            if len(frame.content) >= LARGE_FRAME_CHARS:
+                frame = await anyio.to_thread.run_sync(encode_frame, frame, self.binary)
+            await self._send(frame)
 
         elif event_type == "error":
-            await self.websocket.send_json({
-                "type": "error",
-                "content": event.get("content", "Unknown error"),
-            })
+            await self._send(Error(content=event.get("content", "Unknown error")))
 
     async def handle(self):
         """Main WebSocket handling loop."""
@@ -80,53 +222,52 @@ class ChatConnection:
         # Register permission callback
         permission_service.register_callback(self.session_id, self.send_event)
 
+        self._writer_task = asyncio.create_task(self._writer())
+
+        if self.binary:
+            frames = self.websocket.iter_bytes()
+        else:
+            frames = self.websocket.iter_text()
+
         try:
-            # Handle incoming messages
-            while True:
+            # Handle incoming messages (the iterator ends on disconnect)
+            async for raw in frames:
                 try:
-                    data = await self.websocket.receive_json()
-                except json.JSONDecodeError:
-                    await self.websocket.send_json({
-                        "type": "error",
-                        "content": "Invalid JSON message"
-                    })
+                    msg = self._decoder.decode(raw)
+                except msgspec.ValidationError as e:
+                    await self._send(Error(content=f"Invalid message: {e}"))
+                    continue
+                except msgspec.DecodeError:
+                    fmt = "msgpack" if self.binary else "JSON"
+                    await self._send(Error(content=f"Invalid {fmt} message"))
                     continue
 
-                msg_type = data.get("type")
-
-                if msg_type == "message":
-                    await self._handle_user_message(data)
-
-                elif msg_type == "command":
-                    await self._handle_command(data)
-
-                elif msg_type == "permission_response":
-                    await self._handle_permission_response(data)
-
-                elif msg_type == "ping":
-                    await self.websocket.send_json({"type": "pong"})
+                await self._handlers[type(msg)](msg)
 
         except WebSocketDisconnect:
             pass
         finally:
+            self.closed = True
             claude_service.unsubscribe(self.session_id, self.send_response)
             permission_service.unregister_callback(self.session_id)
+            self._writer_task.cancel()
 
-    async def _handle_user_message(self, data: dict):
+    async def _handle_ping(self, msg: Ping):
+        """Answer a keepalive ping."""
+        await self._send(self._frames["pong"])
+
+    async def _handle_user_message(self, msg: UserMessage):
         """Handle user message - send to Claude and return response."""
-        content = data.get("content", "").strip()
-        mode = data.get("mode", "normal")
-        use_streaming = data.get("streaming", self.use_streaming)
+        content = msg.content.strip()
+        mode = msg.mode
+        use_streaming = self.use_streaming if msg.streaming is None else msg.streaming
 
         if not content:
-            await self.websocket.send_json({
-                "type": "error",
-                "content": "Empty message"
-            })
+            await self._send(Error(content="Empty message"))
             return
 
         # Send typing indicator
-        await self.websocket.send_json({"type": "typing", "status": True})
+        await self._send(self._frames["typing_on"])
 
         try:
             if use_streaming:
@@ -145,39 +286,25 @@ class ChatConnection:
                     mode=mode
                 )
 
-        except ValueError as e:
-            await self.websocket.send_json({
-                "type": "error",
-                "content": str(e)
-            })
-
-        except RuntimeError as e:
-            await self.websocket.send_json({
-                "type": "error",
-                "content": str(e)
-            })
-
         except Exception as e:
-            await self.websocket.send_json({
-                "type": "error",
-                "content": f"Unexpected error: {str(e)}"
-            })
+            # Session/CLI errors carry messages meant for the user
+            if isinstance(e, (ValueError, RuntimeError)):
+                content = str(e)
+            else:
+                content = f"Unexpected error: {e}"
+            await self._send(Error(content=content))
 
         finally:
             # Clear typing indicator
-            await self.websocket.send_json({"type": "typing", "status": False})
+            await self._send(self._frames["typing_off"])
 
-    async def _handle_command(self, data: dict):
+    async def _handle_command(self, msg: Command):
         """Handle slash command execution."""
-        command = data.get("command", "").strip()
-        args = data.get("args", [])
+        command = msg.command.strip()
+        args = msg.args
 
         if not command:
-            await self.websocket.send_json({
-                "type": "command_error",
-                "command": "",
-                "error": "Empty command"
-            })
+            await self._send(CommandError(command="", error="Empty command"))
             return
 
         try:
@@ -188,55 +315,40 @@ class ChatConnection:
             )
 
             if result.get("success"):
-                await self.websocket.send_json({
-                    "type": "command_result",
-                    "command": command,
-                    "success": True,
-                    "content": result.get("content", ""),
-                    "data": result.get("data")
-                })
+                await self._send(CommandResult(
+                    command=command,
+                    content=result.get("content", ""),
+                    data=result.get("data"),
+                ))
             else:
-                await self.websocket.send_json({
-                    "type": "command_error",
-                    "command": command,
-                    "error": result.get("content", "Command failed")
-                })
+                await self._send(CommandError(
+                    command=command,
+                    error=result.get("content", "Command failed"),
+                ))
 
         except Exception as e:
-            await self.websocket.send_json({
-                "type": "command_error",
-                "command": command,
-                "error": str(e)
-            })
+            await self._send(CommandError(command=command, error=str(e)))
 
-    async def _handle_permission_response(self, data: dict):
+    async def _handle_permission_response(self, msg: PermissionResponse):
         """Handle permission response from client."""
-        request_id = data.get("request_id")
-        allowed = data.get("allowed", False)
-        scope = data.get("scope", "once")
+        request_id = msg.request_id
+        allowed = msg.allowed
+        scope = msg.scope
 
         if not request_id:
-            await self.websocket.send_json({
-                "type": "error",
-                "content": "Missing request_id in permission response"
-            })
+            await self._send(Error(content="Missing request_id in permission response"))
             return
 
         # Map scope string to enum
-        scope_map = {
-            "once": PermissionScope.ONCE,
-            "session": PermissionScope.SESSION,
-            "always": PermissionScope.ALWAYS,
-        }
-        permission_scope = scope_map.get(scope, PermissionScope.ONCE)
+        permission_scope = _SCOPE_MAP.get(scope, PermissionScope.ONCE)
 
         # Resolve the permission request
         permission_service.resolve_permission(request_id, allowed, permission_scope)
 
 
-@router.websocket("/ws/chat/{session_id}")
-async def chat_websocket(websocket: WebSocket, session_id: str):
+async def chat_websocket(websocket: WebSocket):
     """WebSocket endpoint for Claude chat."""
+    session_id = websocket.path_params["session_id"]
 
     # Validate session exists
     session = await claude_service.get_session(session_id)
@@ -244,30 +356,31 @@ async def chat_websocket(websocket: WebSocket, session_id: str):
         await websocket.close(code=4004, reason="Session not found")
         return
 
-    # Accept connection
-    await websocket.accept()
+    # Accept connection, switching to msgpack if the client asked for it
+    binary = MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+    await websocket.accept(subprotocol=MSGPACK_SUBPROTOCOL if binary else None)
 
     try:
         # Send initial connected message
-        await websocket.send_json({
-            "type": "connected",
-            "session_id": session_id,
-            "working_dir": session.working_dir
-        })
+        await send_fast(websocket, Connected(
+            session_id=session_id,
+            working_dir=session.working_dir,
+        ), binary)
 
         # Create connection handler
-        connection = ChatConnection(websocket, session_id)
+        connection = ChatConnection(websocket, session_id, binary=binary)
         await connection.handle()
     except WebSocketDisconnect:
         # Client disconnected - this is normal, no need to log
         pass
-    except Exception as e:
+    except Exception:
         # Only log unexpected errors
-        print(f"WebSocket error: {e}")
+        logger.exception("WebSocket error")
+
 
+# Plain Starlette routes: the endpoints take no dependencies, so skip
+# FastAPI's dependency resolution on every upgrade
+router.add_websocket_route("/ws/chat/{session_id}", chat_websocket)
 
 # Keep the old endpoint for backwards compatibility during transition
-@router.websocket("/ws/terminal/{session_id}")
-async def terminal_websocket_legacy(websocket: WebSocket, session_id: str):
-    """Legacy WebSocket endpoint - redirects to chat endpoint."""
-    await chat_websocket(websocket, session_id)
+router.add_websocket_route("/ws/terminal/{session_id}", chat_websocket)
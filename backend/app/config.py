@@ -31,6 +31,13 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./aiadmin.db"
+    DB_POOL_SIZE: int = 15
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800  # 30 minutes
+
+    # Redis
+    REDIS_URL: str = "redis://localhost:6379/0"
 
     # Frontend
     FRONTEND_URL: str = "http://localhost:3000"
@@ -38,6 +45,19 @@ class Settings(BaseSettings):
     # Repos storage path
     REPOS_BASE_PATH: str = "/tmp/repos"
 
+    # Worker threads for blocking calls (to_thread, sync deps)
+    THREADPOOL_TOKENS: int = 200
+
+    # Start each session's next Claude process ahead of the next message.
+    # Off by default: relies on the CLI idling on stdin until a prompt arrives
+    CLAUDE_PREWARM: bool = False
+    CLAUDE_PREWARM_MAX: int = 16  # Idle processes kept at once; oldest evicted
+    CLAUDE_PREWARM_TTL: int = 300  # Seconds an unused process is kept
+
+    # Per-session service state idle this long (seconds) is garbage collected
+    SESSION_MAX_AGE: int = 60 * 60 * 24  # 24 hours
+    SESSION_GC_INTERVAL: int = 300  # 5 minutes
+
     class Config:
         env_file = ".env"
         extra = "ignore"
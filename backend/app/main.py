@@ -1,6 +1,10 @@
 """FastAPI application entry point."""
+import logging
+import queue
 from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
@@ -8,27 +12,72 @@ from starlette.middleware.sessions import SessionMiddleware
 from app.config import settings
 from app.api.routes import api_router
 from app.api.websocket.terminal import router as ws_router
-from app.models.database import init_db
+from app.models.database import init_db, close_db
 from app.services.claude_service import claude_service
+from app.services.http_service import close_http
+from app.services.mcp_service import mcp_service
+from app.services.permission_service import permission_service
+from app.services.redis_service import close_redis
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging() -> QueueListener:
+    """
+    Route app logs through a queue.
+
+    Handlers run on the listener's thread, so a slow stdout never blocks
+    the event loop.
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(levelname)s:     %(name)s - %(message)s"))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
+    app_logger.handlers = [QueueHandler(log_queue)]
+    app_logger.propagate = False
+
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    return listener
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
+    log_listener = setup_logging()
+
     # Startup
-    print("Starting AI Admin UI Backend...")
+    logger.info("Starting AI Admin UI Backend...")
+
+    # Default is 40 threads, which serializes blocking work under load
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = settings.THREADPOOL_TOKENS
 
     # Initialize database
     await init_db()
-    print("Database initialized")
+    logger.info("Database initialized")
+
+    # Sweep per-session state left behind by sessions that never terminated
+    permission_service.start_gc()
+    mcp_service.start_gc()
 
     yield
 
     # Shutdown - cleanup all sessions
-    print("Shutting down...")
+    logger.info("Shutting down...")
+    permission_service.stop_gc()
+    mcp_service.stop_gc()
     for session_id in list(claude_service.sessions.keys()):
         await claude_service.terminate_session(session_id)
-    print("All sessions terminated")
+    await claude_service.close()
+    logger.info("All sessions terminated")
+
+    await close_db()
+    await close_redis()
+    await close_http()
+    log_listener.stop()
 
 
 app = FastAPI(
@@ -80,4 +129,10 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
+        # uvloop/httptools ship with uvicorn[standard]
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        # Chat frames are small; compressing each one costs more than it saves
+        ws_per_message_deflate=False,
     )
@@ -1,23 +1,26 @@
 """Claude credentials model for storing user's Claude API credentials."""
 import uuid
-from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, func
 from sqlalchemy.orm import relationship
 
 from app.models.database import Base
+from app.models.types import GUID
 
 
 class ClaudeCredentials(Base):
     """Model for storing encrypted Claude credentials per user."""
 
     __tablename__ = "claude_credentials"
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String(36), ForeignKey("users.id"), unique=True, nullable=False, index=True)
+    id = Column(GUID(), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(GUID(), ForeignKey("users.id"), unique=True, nullable=False, index=True)
     credentials_encrypted = Column(Text, nullable=False)  # Encrypted credentials.json content
 
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
+    updated_at = Column(
+        DateTime, default=func.now(), server_default=func.now(), onupdate=func.now()
+    )
 
     # Relationship
     user = relationship("User", backref="claude_credentials")
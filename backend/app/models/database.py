@@ -1,15 +1,54 @@
 """Database configuration and session management."""
+import logging
+import uuid
+from typing import Annotated, AsyncGenerator
+
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.config import settings
+from app.models.types import GUID
+
+logger = logging.getLogger(__name__)
+
+
+def _pool_options(database_url: str) -> dict:
+    """Connection pool settings (in-memory SQLite needs its static pool)."""
+    if database_url.startswith("sqlite") and ":memory:" in database_url:
+        return {}
+
+    return {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
 
 
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
+    **_pool_options(settings.DATABASE_URL),
 )
 
+
+if settings.DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Tune each new SQLite connection (WAL lets reads run alongside writes)."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+        cursor.close()
+
+
 async_session_maker = async_sessionmaker(
     engine,
     class_=AsyncSession,
@@ -22,16 +61,73 @@ class Base(DeclarativeBase):
     pass
 
 
-async def get_db():
-    """Dependency to get database session."""
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency to get database session.
+
+    Commits when the route returns and rolls back if it raises.
+    """
     async with async_session_maker() as session:
         try:
             yield session
-        finally:
-            await session.close()
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+# Finish the transaction before the response is sent
+SessionDep = Annotated[AsyncSession, Depends(get_db, scope="function")]
+
+
+def _create_missing_indexes(sync_conn):
+    """
+    Add indexes declared after a table was first created.
+
+    create_all() skips existing tables entirely, indexes included.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                with sync_conn.begin_nested():
+                    index.create(sync_conn, checkfirst=True)
+            except IntegrityError:
+                # Unique index over existing duplicate rows
+                logger.warning("Could not create index %s", index.name, exc_info=True)
+
+
+def _migrate_text_guids(sync_conn):
+    """Convert ids stored as 36-char text (pre-GUID columns) to 16-byte blobs."""
+    if sync_conn.dialect.name != "sqlite":
+        return
+
+    for table in Base.metadata.sorted_tables:
+        for column in table.columns:
+            if not isinstance(column.type, GUID):
+                continue
+            tbl, col = f'"{table.name}"', f'"{column.name}"'
+            rows = sync_conn.exec_driver_sql(
+                f"SELECT DISTINCT {col} FROM {tbl} WHERE typeof({col}) = 'text'"
+            ).all()
+            for (value,) in rows:
+                try:
+                    packed = uuid.UUID(value).bytes
+                except ValueError:
+                    continue
+                sync_conn.exec_driver_sql(
+                    f"UPDATE {tbl} SET {col} = ? WHERE {col} = ?",
+                    (packed, value),
+                )
 
 
 async def init_db():
     """Initialize database tables."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_migrate_text_guids)
+        await conn.run_sync(_create_missing_indexes)
+
+
+async def close_db():
+    """Close all pooled database connections."""
+    await engine.dispose()
@@ -1,19 +1,24 @@
 """Repository model for connected GitHub repositories."""
 import uuid
-from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Integer, ForeignKey
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 
 from app.models.database import Base
+from app.models.types import GUID
 
 
 class Repository(Base):
     """Repository model for storing connected GitHub repos."""
 
     __tablename__ = "repositories"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Connect/duplicate checks look up (user_id, github_repo_id)
+        Index("ix_repositories_user_github_repo", "user_id", "github_repo_id", unique=True),
+    )
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    id = Column(GUID(), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(GUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
 
     github_repo_id = Column(Integer, nullable=False)
     full_name = Column(String(255), nullable=False)  # e.g., "org/repo"
@@ -24,8 +29,10 @@ class Repository(Base):
     # Vercel integration
     vercel_project_id = Column(String(255), nullable=True)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
+    updated_at = Column(
+        DateTime, default=func.now(), server_default=func.now(), onupdate=func.now()
+    )
 
     # Relationships
     user = relationship("User", back_populates="repositories")
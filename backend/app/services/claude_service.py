@@ -1,19 +1,26 @@
 """Claude Code service for running commands via non-interactive mode."""
 import asyncio
-import json
+import fcntl
+import logging
 import os
 import uuid
 import shutil
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Callable, Literal, Optional, Set
+from typing import Any, AsyncIterator, Callable, Literal, Optional
 
+import orjson
+
+from app.services.mcp_service import mcp_service
 from app.services.permission_service import (
     permission_service,
     ToolType,
     PermissionScope,
 )
 from app.api.routes.credentials import get_user_credentials
+from app.config import settings
+
+logger = logging.getLogger(__name__)
 
 # Plan mode system prompt
 PLAN_MODE_PROMPT = """You are in PLAN MODE. Before taking any actions:
@@ -34,6 +41,9 @@ If the user rejects or modifies the plan, adjust accordingly.
 
 Remember: In plan mode, ALWAYS plan first, then wait for explicit approval before making any changes."""
 
+# Everything before the user's message in a plan mode prompt, encoded once
+_PLAN_PREFIX = f"{PLAN_MODE_PROMPT}\n\n---\n\nUser request: ".encode()
+
 # Pre-approved tools for sandboxed sessions
 # Using --allowedTools flag instead of --permission-mode to avoid root user restrictions
 ALLOWED_TOOLS = [
@@ -50,6 +60,165 @@ ALLOWED_TOOLS = [
 ]
 
 
+STREAM_READ_SIZE = 64 * 1024  # Bytes read from the CLI's stdout at a time
+CALLBACK_QUEUE_SIZE = 256  # Stream events buffered ahead of a slow callback
+PIPE_BUFFER_SIZE = 1024 * 1024  # Kernel buffer for the CLI's stdout (Linux default is 64 KiB)
+
+# Plain output from the CLI: no ANSI colour codes in text or error output
+CLI_ENV = {"NO_COLOR": "1", "FORCE_COLOR": "0", "NODE_DISABLE_COLORS": "1"}
+
+
+def _grow_pipe(fd: int):
+    """Enlarge a pipe's kernel buffer so bursts of output don't stall the writer."""
+    set_size = getattr(fcntl, "F_SETPIPE_SZ", None)  # Linux only
+    if set_size is None:
+        return
+    try:
+        fcntl.fcntl(fd, set_size, PIPE_BUFFER_SIZE)
+    except OSError:
+        pass  # Above /proc/sys/fs/pipe-max-size; keep the default
+
+
+async def _iter_lines(fd: int):
+    """
+    Yield newline-delimited lines read from a non-blocking pipe.
+
+    Reads go straight into one reusable bytearray (no StreamReader buffer
+    in between) in large chunks, and lines may be any length (a single
+    assistant event can exceed 64 KiB).
+    """
+    loop = asyncio.get_running_loop()
+    readable = asyncio.Event()
+    loop.add_reader(fd, readable.set)
+
+    buf = bytearray(STREAM_READ_SIZE)
+    start = end = 0  # Unconsumed data is buf[start:end]
+    try:
+        while True:
+            if start == end:
+                start = end = 0
+            if len(buf) - end < STREAM_READ_SIZE:
+                # Long partial line - drop consumed bytes and make room
+                del buf[:start]
+                end -= start
+                start = 0
+                buf.extend(bytes(STREAM_READ_SIZE - (len(buf) - end)))
+
+            try:
+                with memoryview(buf) as view:
+                    n = os.readv(fd, [view[end:]])
+            except BlockingIOError:
+                readable.clear()
+                await readable.wait()
+                continue
+            if not n:
+                break
+
+            search = end
+            end += n
+            while (i := buf.find(b"\n", search, end)) != -1:
+                yield bytes(buf[start:i])
+                start = search = i + 1
+        if start < end:
+            yield bytes(buf[start:end])
+    finally:
+        loop.remove_reader(fd)
+
+
+# git status codes shown by /files; anything else is shown as-is
+_FILE_STATUS = {
+    "M": "modified",
+    "A": "added",
+    "D": "deleted",
+    "R": "renamed",
+    "?": "untracked",
+}
+
+
+@dataclass
+class _StreamState:
+    """Bookkeeping for one stream-json turn."""
+
+    track_tools: bool
+    has_text: bool = False  # Whether any response text was seen
+    tool_uses: list[dict[str, Any]] = field(default_factory=list)
+
+
+# Stream-json event handlers. Each reads only the fields it needs (a
+# missing one raises KeyError and the event is skipped) and returns the
+# event to pass to the callback, if any.
+
+def _on_assistant(event: dict, state: _StreamState) -> Optional[dict]:
+    """Text content from Claude."""
+    texts = [block["text"] for block in event["message"]["content"] if block["type"] == "text"]
+    if not texts:
+        return None
+    state.has_text = True
+    return {"type": "text_delta", "content": "".join(texts)}
+
+
+def _on_block_start(event: dict, state: _StreamState) -> Optional[dict]:
+    """Start of a content block (could be text or tool_use)."""
+    block = event["content_block"]
+    if not state.track_tools or block["type"] != "tool_use":
+        return None
+    tool_id = block["id"]
+    tool_name = block.get("name", "unknown")
+    state.tool_uses.append({
+        "id": tool_id,
+        "name": tool_name,
+        "input": {},
+        "status": "running",
+    })
+    return {"type": "tool_use_start", "tool_id": tool_id, "tool_name": tool_name}
+
+
+def _on_block_delta(event: dict, state: _StreamState) -> Optional[dict]:
+    """Delta for a content block (tool input deltas are not surfaced)."""
+    delta = event["delta"]
+    if delta["type"] != "text_delta":
+        return None
+    state.has_text = True
+    return {"type": "text_delta", "content": delta["text"]}
+
+
+def _on_block_stop(event: dict, state: _StreamState) -> Optional[dict]:
+    """End of a content block (tool_uses stays empty when not tracking)."""
+    if not state.tool_uses:
+        return None
+    tool = state.tool_uses[-1]
+    tool["status"] = "completed"
+    return {"type": "tool_use_end", "tool_id": tool["id"], "tool_name": tool["name"]}
+
+
+def _on_result(event: dict, state: _StreamState) -> Optional[dict]:
+    """Final result - only passed on when nothing was streamed."""
+    result_text = event["result"]
+    if not result_text or state.has_text:
+        return None
+    state.has_text = True
+    return {"type": "text_delta", "content": result_text}
+
+
+def _on_error(event: dict, state: _StreamState) -> Optional[dict]:
+    """Error from Claude."""
+    try:
+        error_msg = event["error"]["message"]
+    except (KeyError, TypeError):
+        error_msg = "Unknown error"
+    return {"type": "error", "content": error_msg}
+
+
+_STREAM_HANDLERS = {
+    "assistant": _on_assistant,
+    "content_block_start": _on_block_start,
+    "content_block_delta": _on_block_delta,
+    "content_block_stop": _on_block_stop,
+    "result": _on_result,
+    "error": _on_error,
+}
+
+
 @dataclass
 class ClaudeSession:
     """Represents a Claude Code session."""
@@ -59,11 +228,15 @@ class ClaudeSession:
     repo_id: str
     working_dir: str
     claude_session_id: str  # UUID for Claude --session-id / --resume
-    subscribers: Set[Callable] = field(default_factory=set)
+    subscribers: tuple[Callable, ...] = ()  # Replaced, never mutated
     is_active: bool = True
     created_at: datetime = field(default_factory=datetime.utcnow)
+    created_at_iso: str = field(init=False)  # created_at never changes, so format it once
     message_count: int = 0
 
+    def __post_init__(self):
+        self.created_at_iso = self.created_at.isoformat()
+
 
 class ClaudeService:
     """
@@ -75,7 +248,20 @@ class ClaudeService:
 
     def __init__(self):
         self.sessions: dict[str, ClaudeSession] = {}
+        # user_id -> {session_id: session}, so per-user listing skips a full scan
+        self._user_sessions: dict[str, dict[str, ClaudeSession]] = {}
         self._credential_dirs: dict[str, str] = {}  # session_id -> credential dir path
+        # session_id -> ((turn, cmd, env), idle process waiting for the next prompt, stdout fd)
+        self._prewarmed: dict[str, tuple[tuple, asyncio.subprocess.Process, Optional[int]]] = {}
+        self._prewarm_tasks: set[asyncio.Task] = set()
+        self._prewarm_watchers: set[asyncio.Task] = set()  # Reap parked processes that exit
+        # Slash command name -> handler, built once
+        self._cmd_handlers = {
+            "status": self._cmd_status,
+            "files": self._cmd_files,
+            "compact": self._cmd_compact,
+            "cost": self._cmd_cost,
+        }
 
     async def _setup_user_credentials(self, session: ClaudeSession) -> dict[str, str]:
         """
@@ -115,6 +301,166 @@ class ClaudeService:
                 pass  # Best effort cleanup
             del self._credential_dirs[session_id]
 
+    def _build_cmd(
+        self,
+        session: ClaudeSession,
+        output_format: str,
+        mode: Literal["normal", "plan"],
+    ) -> list[str]:
+        """
+        Claude CLI arguments for the session's next turn.
+
+        The prompt is not included - it is written to stdin, which lets the
+        process be started before the message is known.
+        """
+        cmd = ["claude", "-p"]
+        if session.message_count == 0:
+            # First message - use --session-id to create new session
+            cmd += ["--session-id", session.claude_session_id]
+        else:
+            # Follow-up message - use --resume to continue session
+            cmd += ["--resume", session.claude_session_id]
+
+        cmd += ["--output-format", output_format]
+        if output_format == "stream-json":
+            cmd.append("--verbose")  # Required when using stream-json with -p
+
+        # Use --allowedTools to pre-approve tools (avoids root user permission issues)
+        cmd += ["--allowedTools", " ".join(ALLOWED_TOOLS)]
+
+        if mode == "plan":
+            cmd += ["--permission-mode", "plan"]
+        return cmd
+
+    async def _spawn_claude(
+        self,
+        session: ClaudeSession,
+        cmd: list[str],
+        user_env: dict[str, str],
+    ) -> tuple[asyncio.subprocess.Process, Optional[int]]:
+        """Start Claude for a turn, taking over the prewarmed process if it matches."""
+        warm = self._prewarmed.pop(session.session_id, None)
+        if warm:
+            warm_key, process, stdout_fd = warm
+            if warm_key == (session.message_count, cmd, user_env) and process.returncode is None:
+                return process, stdout_fd
+            await self._kill(process, stdout_fd)
+
+        return await self._exec_claude(session, cmd, user_env)
+
+    @staticmethod
+    async def _exec_claude(
+        session: ClaudeSession,
+        cmd: list[str],
+        user_env: dict[str, str],
+    ) -> tuple[asyncio.subprocess.Process, Optional[int]]:
+        """
+        Start the Claude CLI.
+
+        stream-json output goes to a plain pipe whose read end is returned
+        for _iter_lines; otherwise stdout is an asyncio pipe and the fd is None.
+        """
+        env = os.environ.copy()
+        env.update(CLI_ENV)
+        env.update(user_env)
+
+        stdout_fd, stdout = None, asyncio.subprocess.PIPE
+        if "stream-json" in cmd:
+            stdout_fd, stdout = os.pipe()
+            os.set_blocking(stdout_fd, False)
+            _grow_pipe(stdout_fd)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                cwd=session.working_dir,
+                env=env,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=stdout,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except BaseException:
+            if stdout_fd is not None:
+                os.close(stdout_fd)
+            raise
+        finally:
+            if stdout_fd is not None:
+                os.close(stdout)  # The child has its own copy of the write end
+        return process, stdout_fd
+
+    def _prewarm(
+        self,
+        session: ClaudeSession,
+        output_format: str,
+        mode: Literal["normal", "plan"],
+        user_env: dict[str, str],
+    ):
+        """
+        Start the next turn's Claude process in the background.
+
+        It waits on stdin until the next message arrives, so exec and CLI
+        start-up happen while the user is still reading the last reply.
+        """
+        if not settings.CLAUDE_PREWARM or session.session_id in self._prewarmed:
+            return
+
+        async def spawn():
+            cmd = self._build_cmd(session, output_format, mode)
+            key = (session.message_count, cmd, user_env)
+            try:
+                process, stdout_fd = await self._exec_claude(session, cmd, user_env)
+            except OSError:
+                return  # The next turn will spawn (and report) normally
+            if session.is_active and session.session_id not in self._prewarmed:
+                self._prewarmed[session.session_id] = (key, process, stdout_fd)
+                watcher = asyncio.create_task(self._reap_on_exit(session.session_id, process))
+                self._prewarm_watchers.add(watcher)
+                watcher.add_done_callback(self._prewarm_watchers.discard)
+                asyncio.get_running_loop().call_later(
+                    settings.CLAUDE_PREWARM_TTL,
+                    self._expire_prewarmed, session.session_id, process,
+                )
+                # Cap idle processes; dicts keep insertion order, so oldest first
+                while len(self._prewarmed) > settings.CLAUDE_PREWARM_MAX:
+                    oldest = next(iter(self._prewarmed))
+                    self._track(self._kill(*self._prewarmed.pop(oldest)[1:]))
+            else:
+                await self._kill(process, stdout_fd)
+
+        self._track(spawn())
+
+    def _track(self, coro):
+        """Run a prewarm spawn/kill in the background; close() awaits these."""
+        task = asyncio.create_task(coro)
+        self._prewarm_tasks.add(task)
+        task.add_done_callback(self._prewarm_tasks.discard)
+
+    async def _reap_on_exit(self, session_id: str, process: asyncio.subprocess.Process):
+        """Drop a parked process as soon as it exits instead of at its TTL."""
+        await process.wait()
+        warm = self._prewarmed.get(session_id)
+        if warm and warm[1] is process:
+            del self._prewarmed[session_id]
+            await self._kill(*warm[1:])  # Already exited - just closes the fd
+
+    def _expire_prewarmed(self, session_id: str, process: asyncio.subprocess.Process):
+        """Kill a prewarmed process that went unused for CLAUDE_PREWARM_TTL."""
+        warm = self._prewarmed.get(session_id)
+        if warm and warm[1] is process:
+            del self._prewarmed[session_id]
+            self._track(self._kill(*warm[1:]))
+
+    @staticmethod
+    async def _kill(process: asyncio.subprocess.Process, stdout_fd: Optional[int] = None):
+        """Kill an unused Claude process and reap it."""
+        if stdout_fd is not None:
+            os.close(stdout_fd)
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+        await process.wait()
+
     async def create_session(
         self,
         session_id: str,
@@ -143,6 +489,7 @@ class ClaudeService:
             claude_session_id=claude_session_id,
         )
         self.sessions[session_id] = session
+        self._user_sessions.setdefault(user_id, {})[session_id] = session
         return session
 
     async def send_message(
@@ -176,53 +523,19 @@ class ClaudeService:
         if not session.is_active:
             raise ValueError("Session is no longer active")
 
-        # Prepend plan mode system prompt if in plan mode
-        effective_message = message
-        if mode == "plan":
-            effective_message = f"{PLAN_MODE_PROMPT}\n\n---\n\nUser request: {message}"
-
-        # Build command based on whether this is first message or follow-up
-        # Use --allowedTools to pre-approve tools (avoids root user permission issues)
-        allowed_tools_str = " ".join(ALLOWED_TOOLS)
-
-        if session.message_count == 0:
-            # First message - use --session-id to create new session
-            cmd = [
-                "claude",
-                "-p", effective_message,
-                "--session-id", session.claude_session_id,
-                "--output-format", "text",
-                "--allowedTools", allowed_tools_str,
-            ]
-        else:
-            # Follow-up message - use --resume to continue session
-            cmd = [
-                "claude",
-                "-p", effective_message,
-                "--resume", session.claude_session_id,
-                "--output-format", "text",
-                "--allowedTools", allowed_tools_str,
-            ]
-
-        # Add plan mode flag if in plan mode
+        # Prompt bytes for stdin, with the plan mode system prompt prepended in plan mode
+        effective_message = message.encode()
         if mode == "plan":
-            cmd.extend(["--permission-mode", "plan"])
+            effective_message = _PLAN_PREFIX + effective_message
 
         # Set up user-specific credentials if available
-        env = os.environ.copy()
         user_env = await self._setup_user_credentials(session)
-        env.update(user_env)
 
-        # Run Claude and capture output
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            cwd=session.working_dir,
-            env=env,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
+        # Run Claude with the prompt on stdin and capture output
+        cmd = self._build_cmd(session, "text", mode)
+        process, _ = await self._spawn_claude(session, cmd, user_env)
 
-        stdout, stderr = await process.communicate()
+        stdout, stderr = await process.communicate(effective_message)
 
         if process.returncode != 0:
             error_msg = stderr.decode().strip()
@@ -233,37 +546,38 @@ class ClaudeService:
 
         response = stdout.decode()
         session.message_count += 1
+        self._prewarm(session, "text", mode, user_env)
 
-        # Broadcast to subscribers (for WebSocket clients)
-        for callback in list(session.subscribers):
-            try:
-                await callback(response)
-            except Exception as e:
-                print(f"Error broadcasting to subscriber: {e}")
+        # Broadcast to subscribers (for WebSocket clients) concurrently
+        if session.subscribers:
+            results = await asyncio.gather(
+                *(callback(response) for callback in session.subscribers),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error("Error broadcasting to subscriber", exc_info=result)
 
         return response
 
-    async def send_message_streaming(
+    async def iter_message_stream(
         self,
         session_id: str,
         message: str,
         mode: Literal["normal", "plan"] = "normal",
-        event_callback: Optional[Callable] = None,
-    ) -> str:
+        track_tools: bool = True,
+    ) -> AsyncIterator[dict[str, Any]]:
         """
-        Send a message to Claude with streaming JSON output.
+        Send a message to Claude and yield its events as they stream in.
 
-        This version uses stream-json format to emit real-time events
-        for tool use, text chunks, and other activities.
-
-        Args:
-            session_id: Session identifier
-            message: User message to send
-            mode: Session mode - 'normal' or 'plan'
-            event_callback: Async callback for streaming events
+        Yields text_delta, tool_use_start/tool_use_end (when track_tools)
+        and error events, then a final complete event carrying tool_uses.
+        Response text is not accumulated - consumers that need the whole
+        reply should use send_message_streaming.
 
-        Returns:
-            Claude's complete response text
+        Raises:
+            ValueError: If session not found
+            RuntimeError: If Claude returns an error
         """
         session = self.sessions.get(session_id)
         if not session:
@@ -272,152 +586,63 @@ class ClaudeService:
         if not session.is_active:
             raise ValueError("Session is no longer active")
 
-        # Prepend plan mode system prompt if in plan mode
-        effective_message = message
-        if mode == "plan":
-            effective_message = f"{PLAN_MODE_PROMPT}\n\n---\n\nUser request: {message}"
-
-        # Build command with stream-json output
-        # Note: --verbose is required when using stream-json with -p
-        # Use --allowedTools to pre-approve tools (avoids root user permission issues)
-        allowed_tools_str = " ".join(ALLOWED_TOOLS)
-
-        if session.message_count == 0:
-            cmd = [
-                "claude",
-                "-p", effective_message,
-                "--session-id", session.claude_session_id,
-                "--output-format", "stream-json",
-                "--verbose",
-                "--allowedTools", allowed_tools_str,
-            ]
-        else:
-            cmd = [
-                "claude",
-                "-p", effective_message,
-                "--resume", session.claude_session_id,
-                "--output-format", "stream-json",
-                "--verbose",
-                "--allowedTools", allowed_tools_str,
-            ]
-
-        # Add plan mode flag if in plan mode
+        # Prompt bytes for stdin, with the plan mode system prompt prepended in plan mode
+        effective_message = message.encode()
         if mode == "plan":
-            cmd.extend(["--permission-mode", "plan"])
+            effective_message = _PLAN_PREFIX + effective_message
 
         # Set up user-specific credentials if available
-        env = os.environ.copy()
         user_env = await self._setup_user_credentials(session)
-        env.update(user_env)
 
         # Run Claude and stream output
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            cwd=session.working_dir,
-            env=env,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-
-        full_response = []
-        tool_uses = []
-
-        # Read stdout line by line (NDJSON format)
-        while True:
-            line = await process.stdout.readline()
-            if not line:
-                break
-
+        cmd = self._build_cmd(session, "stream-json", mode)
+        process, stdout_fd = await self._spawn_claude(session, cmd, user_env)
+        lines = _iter_lines(stdout_fd)
+        state = _StreamState(track_tools=track_tools)
+        try:
             try:
-                event = json.loads(line.decode().strip())
-                event_type = event.get("type")
-
-                if event_type == "assistant":
-                    # Text content from Claude
-                    message_content = event.get("message", {})
-                    content = message_content.get("content", [])
-                    for block in content:
-                        if block.get("type") == "text":
-                            text = block.get("text", "")
-                            full_response.append(text)
-                            if event_callback:
-                                await event_callback({
-                                    "type": "text_delta",
-                                    "content": text,
-                                })
-
-                elif event_type == "content_block_start":
-                    # Start of a content block (could be text or tool_use)
-                    block = event.get("content_block", {})
-                    if block.get("type") == "tool_use":
-                        tool_id = block.get("id")
-                        tool_name = block.get("name", "unknown")
-                        tool_uses.append({
-                            "id": tool_id,
-                            "name": tool_name,
-                            "input": {},
-                            "status": "running",
-                        })
-                        if event_callback:
-                            await event_callback({
-                                "type": "tool_use_start",
-                                "tool_id": tool_id,
-                                "tool_name": tool_name,
-                            })
-
-                elif event_type == "content_block_delta":
-                    # Delta for a content block
-                    delta = event.get("delta", {})
-                    if delta.get("type") == "text_delta":
-                        text = delta.get("text", "")
-                        full_response.append(text)
-                        if event_callback:
-                            await event_callback({
-                                "type": "text_delta",
-                                "content": text,
-                            })
-                    elif delta.get("type") == "input_json_delta":
-                        # Tool input being streamed
-                        partial_json = delta.get("partial_json", "")
-                        if tool_uses:
-                            # Append to the last tool use
-                            pass  # We'll get complete input later
-
-                elif event_type == "content_block_stop":
-                    # End of a content block
-                    if tool_uses:
-                        tool = tool_uses[-1]
-                        tool["status"] = "completed"
-                        if event_callback:
-                            await event_callback({
-                                "type": "tool_use_end",
-                                "tool_id": tool["id"],
-                                "tool_name": tool["name"],
-                            })
-
-                elif event_type == "result":
-                    # Final result
-                    result_text = event.get("result", "")
-                    if result_text and not full_response:
-                        full_response.append(result_text)
-
-                elif event_type == "error":
-                    # Error from Claude
-                    error_msg = event.get("error", {}).get("message", "Unknown error")
-                    if event_callback:
-                        await event_callback({
-                            "type": "error",
-                            "content": error_msg,
-                        })
-
-            except json.JSONDecodeError:
-                # Not valid JSON, might be plain text error
-                text = line.decode().strip()
-                if text:
-                    full_response.append(text)
-
-        # Wait for process to complete
-        await process.wait()
+                process.stdin.write(effective_message)
+                await process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # Exited early - the exit code and stderr are checked below
+            process.stdin.close()
+
+            # Read stdout straight from the pipe and split it into NDJSON lines
+            async for line in lines:
+                # Only lines starting with "{" can be events; skip the parser otherwise
+                event = None
+                if line[:1] == b"{":
+                    try:
+                        event = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        pass
+
+                if event is None:
+                    # Not valid JSON, might be plain text error
+                    text = line.decode().strip()
+                    if text:
+                        state.has_text = True
+                        yield {"type": "text_delta", "content": text}
+                    continue
+
+                handler = _STREAM_HANDLERS.get(event.get("type"))
+                if handler is None:
+                    continue
+                try:
+                    out = handler(event, state)
+                except (KeyError, TypeError):
+                    continue  # Missing or malformed fields
+                if out is not None:
+                    yield out
+
+            # Wait for process to complete
+            await process.wait()
+        finally:
+            # Also runs if the consumer stops early - don't leave Claude running
+            await lines.aclose()
+            os.close(stdout_fd)
+            if process.returncode is None:
+                await self._kill(process)
 
         # Check for errors
         if process.returncode != 0:
@@ -428,49 +653,124 @@ class ClaudeService:
             if error_msg:
                 raise RuntimeError(f"Claude error: {error_msg}")
 
-        response = "".join(full_response)
         session.message_count += 1
+        self._prewarm(session, "stream-json", mode, user_env)
 
-        # Send completion event via callback (don't use subscribers to avoid duplicates)
+        yield {"type": "complete", "tool_uses": state.tool_uses}
+
+    async def send_message_streaming(
+        self,
+        session_id: str,
+        message: str,
+        mode: Literal["normal", "plan"] = "normal",
+        event_callback: Optional[Callable] = None,
+    ) -> str:
+        """
+        Send a message to Claude with streaming JSON output.
+
+        This version uses stream-json format to emit real-time events
+        for tool use, text chunks, and other activities.
+
+        Args:
+            session_id: Session identifier
+            message: User message to send
+            mode: Session mode - 'normal' or 'plan'
+            event_callback: Async callback for streaming events
+
+        Returns:
+            Claude's complete response text
+        """
+        # Callbacks run on their own task so reading stdout never waits on them
         if event_callback:
-            await event_callback({
-                "type": "complete",
-                "content": response,
-                "tool_uses": tool_uses,
-            })
+            events: asyncio.Queue = asyncio.Queue(maxsize=CALLBACK_QUEUE_SIZE)
+            dispatcher = asyncio.create_task(self._dispatch_events(events, event_callback))
+
+        text = []
+        response = ""
+        try:
+            # tool_uses only ever reaches the caller through the callback
+            stream = self.iter_message_stream(
+                session_id, message, mode, track_tools=event_callback is not None,
+            )
+            async for event in stream:
+                if event["type"] == "text_delta":
+                    text.append(event["content"])
+                elif event["type"] == "complete":
+                    response = "".join(text)
+                    event = {
+                        "type": "complete",
+                        "content": response,
+                        "tool_uses": event["tool_uses"],
+                    }
+                if event_callback:
+                    await events.put(event)
+        finally:
+            if event_callback:
+                # Deliver everything queued so far before returning or raising
+                await events.put(None)
+                await dispatcher
 
         return response
 
+    @staticmethod
+    async def _dispatch_events(events: asyncio.Queue, callback: Callable):
+        """Pass queued stream events to the callback in order, until None."""
+        while (event := await events.get()) is not None:
+            try:
+                await callback(event)
+            except Exception:
+                logger.exception("Error in stream event callback")
+
     async def get_session(self, session_id: str) -> Optional[ClaudeSession]:
         """Get session by ID."""
         return self.sessions.get(session_id)
 
     async def list_sessions(self, user_id: str) -> list[ClaudeSession]:
         """List all active sessions for a user."""
-        return [
-            s for s in self.sessions.values()
-            if s.user_id == user_id and s.is_active
-        ]
+        user_sessions = self._user_sessions.get(user_id, {})
+        return [s for s in user_sessions.values() if s.is_active]
 
     async def terminate_session(self, session_id: str):
         """Terminate a session and clean up resources."""
         session = self.sessions.get(session_id)
         if session:
             session.is_active = False
+            warm = self._prewarmed.pop(session_id, None)
+            if warm:
+                await self._kill(*warm[1:])
             # Clean up user credential files
             self._cleanup_credentials(session_id)
+            # Drop per-session permission grants and MCP config
+            permission_service.drop_session(session_id)
+            mcp_service.cleanup_config_file(session_id)
+
+    async def close(self):
+        """
+        Let in-flight prewarm spawns finish, then kill any idle processes.
+
+        Cancelling a spawn midway can leave loop shutdown waiting on the
+        half-started child, so the tasks are awaited rather than cancelled.
+        """
+        if self._prewarm_tasks:
+            await asyncio.gather(*self._prewarm_tasks, return_exceptions=True)
+        # Watchers only wait on exit; processes handed to a turn may outlive them
+        for watcher in self._prewarm_watchers:
+            watcher.cancel()
+        idle = [warm[1:] for warm in self._prewarmed.values()]
+        self._prewarmed.clear()
+        await asyncio.gather(*(self._kill(*args) for args in idle))
 
     def subscribe(self, session_id: str, callback: Callable):
         """Subscribe to session responses."""
         session = self.sessions.get(session_id)
-        if session:
-            session.subscribers.add(callback)
+        if session and callback not in session.subscribers:
+            session.subscribers += (callback,)
 
     def unsubscribe(self, session_id: str, callback: Callable):
         """Unsubscribe from session responses."""
         session = self.sessions.get(session_id)
         if session:
-            session.subscribers.discard(callback)
+            session.subscribers = tuple(cb for cb in session.subscribers if cb != callback)
 
     async def execute_command(
         self, session_id: str, command: str, args: list[str]
@@ -491,14 +791,7 @@ class ClaudeService:
             return {"success": False, "content": "Session not found"}
 
         # Route to appropriate handler
-        handlers = {
-            "status": self._cmd_status,
-            "files": self._cmd_files,
-            "compact": self._cmd_compact,
-            "cost": self._cmd_cost,
-        }
-
-        handler = handlers.get(command)
+        handler = self._cmd_handlers.get(command)
         if not handler:
             return {"success": False, "content": f"Unknown command: /{command}"}
 
@@ -517,14 +810,14 @@ class ClaudeService:
                 f"Session: {session.session_id[:8]}...\n"
                 f"Working directory: {session.working_dir}\n"
                 f"Messages: {session.message_count}\n"
-                f"Created: {session.created_at.isoformat()}\n"
+                f"Created: {session.created_at_iso}\n"
                 f"Active: {session.is_active}"
             ),
             "data": {
                 "session_id": session.session_id,
                 "working_dir": session.working_dir,
                 "message_count": session.message_count,
-                "created_at": session.created_at.isoformat(),
+                "created_at": session.created_at_iso,
                 "is_active": session.is_active,
             },
         }
@@ -536,7 +829,8 @@ class ClaudeService:
         process = await asyncio.create_subprocess_exec(
             "git",
             "status",
-            "--porcelain",
+            "--porcelain=v1",
+            "-z",
             cwd=session.working_dir,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
@@ -550,34 +844,30 @@ class ClaudeService:
                 "content": f"Git error: {stderr.decode().strip()}",
             }
 
-        output = stdout.decode().strip()
-        if not output:
+        if not stdout:
             return {"success": True, "content": "No modified files."}
 
-        # Parse git status output
+        # Parse NUL-separated "XY path" entries (paths are never quoted)
         files = []
-        for line in output.split("\n"):
-            if line:
-                status = line[:2]
-                filepath = line[3:]
-                files.append({"status": status.strip(), "path": filepath})
+        entries = iter(stdout.decode().split("\0"))
+        for entry in entries:
+            if not entry:
+                continue
+            status, filepath = entry[:2], entry[3:]
+            if "R" in status or "C" in status:
+                # Renames/copies are followed by the original path
+                filepath = f"{next(entries, '')} -> {filepath}"
+            files.append((status.strip(), filepath))
 
         content_lines = ["Modified files:", ""]
-        for f in files:
-            status_map = {
-                "M": "modified",
-                "A": "added",
-                "D": "deleted",
-                "R": "renamed",
-                "?": "untracked",
-            }
-            status_text = status_map.get(f["status"], f["status"])
-            content_lines.append(f"  {status_text}: {f['path']}")
+        for status, filepath in files:
+            status_text = _FILE_STATUS.get(status, status)
+            content_lines.append(f"  {status_text}: {filepath}")
 
         return {
             "success": True,
             "content": "\n".join(content_lines),
-            "data": {"files": files},
+            "data": {"files": [{"status": status, "path": filepath} for status, filepath in files]},
         }
 
     async def _cmd_compact(
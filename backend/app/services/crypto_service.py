@@ -1,29 +1,44 @@
 """Encryption service for securing tokens."""
 import base64
 import hashlib
+import os
+
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 from app.config import settings
 
+# Marks AES-GCM ciphertexts; anything else is a legacy Fernet token
+AESGCM_PREFIX = "v2:"
+NONCE_SIZE = 12
+
 
 class CryptoService:
     """Handles encryption/decryption of sensitive data."""
 
     def __init__(self):
-        # Derive a valid Fernet key from the settings key
         key = settings.ENCRYPTION_KEY.encode()
+        # One AES-GCM pass (hardware accelerated) instead of Fernet's
+        # AES-CBC + HMAC; a separate key keeps the two schemes apart
+        self._aead = AESGCM(hashlib.sha256(b"aes-gcm:" + key).digest())
+        # Fernet still decrypts tokens stored before the switch
         # Use SHA256 to get 32 bytes, then base64 encode for Fernet
         derived_key = base64.urlsafe_b64encode(hashlib.sha256(key).digest())
         self.fernet = Fernet(derived_key)
 
     def encrypt(self, data: str) -> str:
         """Encrypt a string and return base64 encoded result."""
-        encrypted = self.fernet.encrypt(data.encode())
-        return encrypted.decode()
+        nonce = os.urandom(NONCE_SIZE)
+        encrypted = self._aead.encrypt(nonce, data.encode(), None)
+        return AESGCM_PREFIX + base64.urlsafe_b64encode(nonce + encrypted).decode()
 
     def decrypt(self, encrypted_data: str) -> str:
         """Decrypt base64 encoded encrypted data."""
-        decrypted = self.fernet.decrypt(encrypted_data.encode())
+        if not encrypted_data.startswith(AESGCM_PREFIX):
+            return self.fernet.decrypt(encrypted_data.encode()).decode()
+
+        raw = base64.urlsafe_b64decode(encrypted_data[len(AESGCM_PREFIX):])
+        decrypted = self._aead.decrypt(raw[:NONCE_SIZE], raw[NONCE_SIZE:], None)
         return decrypted.decode()
 
 
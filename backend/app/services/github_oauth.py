@@ -4,8 +4,10 @@ from urllib.parse import urlencode
 from typing import Optional
 
 import httpx
+import orjson
 
 from app.config import settings
+from app.services.http_service import http_client
 
 
 class GitHubOAuthService:
@@ -16,10 +18,20 @@ class GitHubOAuthService:
     USER_API_URL = "https://api.github.com/user"
     REPOS_API_URL = "https://api.github.com/user/repos"
 
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.client_id = settings.GITHUB_CLIENT_ID
         self.client_secret = settings.GITHUB_CLIENT_SECRET
         self.redirect_uri = settings.GITHUB_REDIRECT_URI
+        # Keep-alive (HTTP/2) connections shared with the other API services
+        self.client = client or http_client
+
+    @staticmethod
+    def _headers(access_token: str) -> dict[str, str]:
+        """Headers for an authenticated GitHub API request."""
+        return {
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/vnd.github+json",
+        }
 
     def get_authorization_url(self, state: Optional[str] = None) -> tuple[str, str]:
         """Generate GitHub OAuth authorization URL."""
@@ -38,39 +50,34 @@ class GitHubOAuthService:
 
     async def exchange_code_for_token(self, code: str) -> str:
         """Exchange authorization code for access token."""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.TOKEN_URL,
-                data={
-                    "client_id": self.client_id,
-                    "client_secret": self.client_secret,
-                    "code": code,
-                    "redirect_uri": self.redirect_uri,
-                },
-                headers={"Accept": "application/json"},
-            )
-
-            response.raise_for_status()
-            data = response.json()
-
-            if "error" in data:
-                raise ValueError(data.get("error_description", data["error"]))
-
-            return data["access_token"]
+        response = await self.client.post(
+            self.TOKEN_URL,
+            data={
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "code": code,
+                "redirect_uri": self.redirect_uri,
+            },
+            headers={"Accept": "application/json"},
+        )
+
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+
+        if "error" in data:
+            raise ValueError(data.get("error_description", data["error"]))
+
+        return data["access_token"]
 
     async def get_user_info(self, access_token: str) -> dict:
         """Fetch user info from GitHub API."""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                self.USER_API_URL,
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Accept": "application/vnd.github+json",
-                },
-            )
-
-            response.raise_for_status()
-            return response.json()
+        response = await self.client.get(
+            self.USER_API_URL,
+            headers=self._headers(access_token),
+        )
+
+        response.raise_for_status()
+        return orjson.loads(response.content)
 
     async def get_user_repos(
         self,
@@ -79,23 +86,52 @@ class GitHubOAuthService:
         per_page: int = 30,
     ) -> list[dict]:
         """Fetch user's repositories."""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                self.REPOS_API_URL,
-                params={
-                    "page": page,
-                    "per_page": per_page,
-                    "sort": "updated",
-                    "affiliation": "owner,collaborator,organization_member",
-                },
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Accept": "application/vnd.github+json",
-                },
-            )
-
-            response.raise_for_status()
-            return response.json()
+        repos, _ = await self.get_user_repos_conditional(
+            access_token=access_token,
+            page=page,
+            per_page=per_page,
+        )
+        return repos
+
+    async def get_user_repos_conditional(
+        self,
+        access_token: str,
+        page: int = 1,
+        per_page: int = 30,
+        etag: Optional[str] = None,
+    ) -> tuple[Optional[list[dict]], Optional[str]]:
+        """
+        Fetch user's repositories, revalidating a previous response.
+
+        Args:
+            access_token: GitHub access token
+            page: Page number
+            per_page: Results per page
+            etag: ETag of a previously fetched page, sent as If-None-Match
+
+        Returns:
+            (repos, etag) - repos is None when GitHub answers 304 Not Modified
+        """
+        headers = self._headers(access_token)
+        if etag:
+            headers["If-None-Match"] = etag
+
+        response = await self.client.get(
+            self.REPOS_API_URL,
+            params={
+                "page": page,
+                "per_page": per_page,
+                "sort": "updated",
+                "affiliation": "owner,collaborator,organization_member",
+            },
+            headers=headers,
+        )
+
+        if response.status_code == 304:
+            return None, etag
+
+        response.raise_for_status()
+        return orjson.loads(response.content), response.headers.get("ETag")
 
     async def create_pull_request(
         self,
@@ -108,23 +144,19 @@ class GitHubOAuthService:
         base: str = "main",
     ) -> dict:
         """Create a pull request on GitHub."""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"https://api.github.com/repos/{owner}/{repo}/pulls",
-                json={
-                    "title": title,
-                    "body": body,
-                    "head": head,
-                    "base": base,
-                },
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Accept": "application/vnd.github+json",
-                },
-            )
-
-            response.raise_for_status()
-            return response.json()
+        response = await self.client.post(
+            f"https://api.github.com/repos/{owner}/{repo}/pulls",
+            json={
+                "title": title,
+                "body": body,
+                "head": head,
+                "base": base,
+            },
+            headers=self._headers(access_token),
+        )
+
+        response.raise_for_status()
+        return orjson.loads(response.content)
 
     async def merge_pull_request(
         self,
@@ -134,17 +166,13 @@ class GitHubOAuthService:
         pull_number: int,
     ) -> dict:
         """Merge a pull request."""
-        async with httpx.AsyncClient() as client:
-            response = await client.put(
-                f"https://api.github.com/repos/{owner}/{repo}/pulls/{pull_number}/merge",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Accept": "application/vnd.github+json",
-                },
-            )
-
-            response.raise_for_status()
-            return response.json()
+        response = await self.client.put(
+            f"https://api.github.com/repos/{owner}/{repo}/pulls/{pull_number}/merge",
+            headers=self._headers(access_token),
+        )
+
+        response.raise_for_status()
+        return orjson.loads(response.content)
 
 
 # Singleton instance
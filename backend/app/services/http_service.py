@@ -0,0 +1,17 @@
+"""HTTP client shared by all outbound API integrations (GitHub, Vercel)."""
+import httpx
+
+
+# One connection pool for the whole process; HTTP/2 multiplexes concurrent
+# requests to a host over one connection. Connections are opened lazily.
+# Auth headers differ per user, so they are passed per request.
+http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=30.0,
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+)
+
+
+async def close_http():
+    """Close the shared connection pool."""
+    await http_client.aclose()
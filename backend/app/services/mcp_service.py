@@ -1,13 +1,20 @@
 """MCP (Model Context Protocol) service for managing MCP server connections."""
-import json
+import asyncio
+import hashlib
 import os
 import tempfile
+import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Any, Optional
 from pathlib import Path
 
+import orjson
+
+from app.config import settings
+from app.services.permission_service import permission_service
+
 
 class MCPServerType(str, Enum):
     STDIO = "stdio"
@@ -58,8 +65,22 @@ class MCPService:
     def __init__(self):
         # Server configs stored per user
         self.servers: dict[str, dict[str, MCPServer]] = {}
+        # Bumped on every change to a user's servers
+        self._user_version: dict[str, int] = {}
+        # user_id -> (version it was built at, generated config)
+        self._config_cache: dict[str, tuple[int, dict[str, Any]]] = {}
         # Config file paths per session
         self.config_files: dict[str, str] = {}
+        # Digest of each session's config file contents, to skip rewrites
+        self.config_hashes: dict[str, str] = {}
+        # Last activity per session (monotonic seconds), for the GC sweep
+        self.last_touch: dict[str, float] = {}
+        self._gc_task: Optional[asyncio.Task] = None
+        # Config files are tiny and read once per CLI start - keep them in
+        # RAM (tmpfs) where available
+        shm = Path("/dev/shm")
+        base = shm if shm.is_dir() else Path(tempfile.gettempdir())
+        self._config_dir = base / "claude_mcp_configs"
 
     def add_server(
         self,
@@ -99,6 +120,7 @@ class MCPService:
         )
 
         self.servers[user_id][name] = server
+        self._bump(user_id)
         return server
 
     def remove_server(self, user_id: str, name: str) -> bool:
@@ -110,9 +132,14 @@ class MCPService:
         """
         if user_id in self.servers and name in self.servers[user_id]:
             del self.servers[user_id][name]
+            self._bump(user_id)
             return True
         return False
 
+    def _bump(self, user_id: str):
+        """Invalidate the user's cached config."""
+        self._user_version[user_id] = self._user_version.get(user_id, 0) + 1
+
     def get_server(self, user_id: str, name: str) -> Optional[MCPServer]:
         """Get a specific server configuration."""
         return self.servers.get(user_id, {}).get(name)
@@ -131,6 +158,7 @@ class MCPService:
         server = self.get_server(user_id, name)
         if server:
             server.enabled = enabled
+            self._bump(user_id)
             return True
         return False
 
@@ -138,9 +166,17 @@ class MCPService:
         """
         Generate MCP configuration dictionary for Claude CLI.
 
+        Built once per change to the user's servers; the returned dict is
+        shared and must not be mutated.
+
         Returns:
             MCP config dict compatible with Claude's --mcp-config
         """
+        version = self._user_version.get(user_id, 0)
+        cached = self._config_cache.get(user_id)
+        if cached and cached[0] == version:
+            return cached[1]
+
         servers = self.list_servers(user_id)
         enabled_servers = [s for s in servers if s.enabled]
 
@@ -151,39 +187,79 @@ class MCPService:
             }
         }
 
+        self._config_cache[user_id] = (version, config)
         return config
 
     def generate_config_file(self, user_id: str, session_id: str) -> str:
         """
         Generate a temporary MCP config file for a session.
 
+        The file is only rewritten when its contents change, and then
+        atomically, so a CLI starting up never reads a half-written file.
+
         Returns:
             Path to the config file
         """
         config = self.generate_config(user_id)
+        self.last_touch[session_id] = time.monotonic()
 
         # Create a temp file that persists for the session
-        config_dir = Path(tempfile.gettempdir()) / "claude_mcp_configs"
-        config_dir.mkdir(exist_ok=True)
+        self._config_dir.mkdir(mode=0o700, exist_ok=True)
+
+        config_path = self._config_dir / f"{session_id}.json"
+        data = orjson.dumps(config, option=orjson.OPT_INDENT_2)
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
 
-        config_path = config_dir / f"{session_id}.json"
-        config_path.write_text(json.dumps(config, indent=2))
+        if self.config_hashes.get(session_id) == digest and config_path.exists():
+            return str(config_path)
+
+        tmp_path = config_path.with_suffix(".json.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, config_path)
 
         self.config_files[session_id] = str(config_path)
+        self.config_hashes[session_id] = digest
         return str(config_path)
 
     def cleanup_config_file(self, session_id: str):
-        """Remove the config file for a session."""
-        if session_id in self.config_files:
-            config_path = Path(self.config_files[session_id])
-            if config_path.exists():
-                config_path.unlink()
-            del self.config_files[session_id]
+        """Remove the config file for a session (safe to call repeatedly)."""
+        config_path = self.config_files.pop(session_id, None)
+        self.config_hashes.pop(session_id, None)
+        if config_path:
+            Path(config_path).unlink(missing_ok=True)
+        self.last_touch.pop(session_id, None)
 
     def get_config_path(self, session_id: str) -> Optional[str]:
         """Get the config file path for a session."""
+        if session_id in self.config_files:
+            self.last_touch[session_id] = time.monotonic()
         return self.config_files.get(session_id)
 
+    async def _gc_loop(self):
+        """
+        Remove config files idle for SESSION_MAX_AGE, every SESSION_GC_INTERVAL.
+
+        Sessions with a connected client (registered permission callback)
+        keep their config however long they've been quiet.
+        """
+        while True:
+            await asyncio.sleep(settings.SESSION_GC_INTERVAL)
+            cutoff = time.monotonic() - settings.SESSION_MAX_AGE
+            for session_id, touched in list(self.last_touch.items()):
+                if touched < cutoff and session_id not in permission_service.request_callbacks:
+                    self.cleanup_config_file(session_id)
+
+    def start_gc(self):
+        """Start the idle-session sweep."""
+        if self._gc_task is None:
+            self._gc_task = asyncio.create_task(self._gc_loop())
+
+    def stop_gc(self):
+        """Stop the idle-session sweep."""
+        if self._gc_task is not None:
+            self._gc_task.cancel()
+            self._gc_task = None
+
     # Pre-configured popular MCP servers
     @staticmethod
     def get_preset_servers() -> list[dict[str, Any]]:
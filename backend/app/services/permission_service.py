@@ -1,11 +1,17 @@
 """Permission service for handling tool use approvals."""
 import asyncio
+import logging
+import time
 import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Callable, Optional
 
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
 
 class ToolType(str, Enum):
     READ = "read"
@@ -46,14 +52,17 @@ class PermissionService:
     def __init__(self):
         # Pending requests waiting for user response
         self.pending_requests: dict[str, PermissionRequest] = {}
-        # Events to signal when a request is resolved
-        self.request_events: dict[str, asyncio.Event] = {}
-        # Results of resolved requests (id -> allowed)
-        self.request_results: dict[str, bool] = {}
+        # Pending request ids per session, so lookups skip other sessions
+        self.pending_by_session: dict[str, set[str]] = {}
+        # Futures completed with the user's answer (id -> allowed)
+        self.request_futures: dict[str, asyncio.Future[bool]] = {}
         # Session permissions (session_id -> {tool:path -> allowed})
         self.session_permissions: dict[str, dict[str, bool]] = {}
         # Callbacks to notify clients of permission requests
         self.request_callbacks: dict[str, Callable] = {}
+        # Last activity per session (monotonic seconds), for the GC sweep
+        self.last_touch: dict[str, float] = {}
+        self._gc_task: Optional[asyncio.Task] = None
 
     def _get_permission_key(self, tool: ToolType, path: Optional[str]) -> str:
         """Generate a permission key for caching."""
@@ -62,6 +71,7 @@ class PermissionService:
     def register_callback(self, session_id: str, callback: Callable):
         """Register a callback for permission request notifications."""
         self.request_callbacks[session_id] = callback
+        self.last_touch[session_id] = time.monotonic()
 
     def unregister_callback(self, session_id: str):
         """Unregister a callback."""
@@ -79,6 +89,7 @@ class PermissionService:
         Returns:
             True if allowed, False if denied, None if not yet decided
         """
+        self.last_touch[session_id] = time.monotonic()
         if session_id not in self.session_permissions:
             return None
 
@@ -140,8 +151,10 @@ class PermissionService:
             command=command,
         )
 
+        future = asyncio.get_running_loop().create_future()
         self.pending_requests[request_id] = request
-        self.request_events[request_id] = asyncio.Event()
+        self.pending_by_session.setdefault(session_id, set()).add(request_id)
+        self.request_futures[request_id] = future
 
         # Notify client via callback
         callback = self.request_callbacks.get(session_id)
@@ -155,23 +168,24 @@ class PermissionService:
                     "path": path,
                     "command": command,
                 })
-            except Exception as e:
-                print(f"Error sending permission request: {e}")
+            except Exception:
+                logger.exception("Error sending permission request")
 
         # Wait for response
         try:
-            await asyncio.wait_for(
-                self.request_events[request_id].wait(),
-                timeout=timeout,
-            )
-            return self.request_results.pop(request_id, False)
+            return await asyncio.wait_for(future, timeout=timeout)
         except asyncio.TimeoutError:
             # Timeout - treat as denied
             return False
         finally:
             # Cleanup
             self.pending_requests.pop(request_id, None)
-            self.request_events.pop(request_id, None)
+            self.request_futures.pop(request_id, None)
+            session_pending = self.pending_by_session.get(session_id)
+            if session_pending is not None:
+                session_pending.discard(request_id)
+                if not session_pending:
+                    del self.pending_by_session[session_id]
 
     def resolve_permission(
         self,
@@ -191,8 +205,7 @@ class PermissionService:
         if not request:
             return
 
-        # Store result
-        self.request_results[request_id] = allowed
+        self.last_touch[request.session_id] = time.monotonic()
 
         # Store permission based on scope
         if scope in (PermissionScope.SESSION, PermissionScope.ALWAYS):
@@ -203,20 +216,55 @@ class PermissionService:
             key = self._get_permission_key(request.tool, request.path)
             self.session_permissions[session_id][key] = allowed
 
-        # Signal the waiting coroutine
-        event = self.request_events.get(request_id)
-        if event:
-            event.set()
+        # Wake the waiting coroutine
+        future = self.request_futures.get(request_id)
+        if future and not future.done():
+            future.set_result(allowed)
 
     def clear_session_permissions(self, session_id: str):
         """Clear all permissions for a session."""
         self.session_permissions.pop(session_id, None)
 
+    def drop_session(self, session_id: str):
+        """Forget everything held for a session (grants, callback)."""
+        self.session_permissions.pop(session_id, None)
+        self.request_callbacks.pop(session_id, None)
+        self.last_touch.pop(session_id, None)
+
+    async def _gc_loop(self):
+        """
+        Drop sessions idle for SESSION_MAX_AGE, every SESSION_GC_INTERVAL.
+
+        Sessions with a connected client (registered callback) or a pending
+        request are kept however long they've been quiet.
+        """
+        while True:
+            await asyncio.sleep(settings.SESSION_GC_INTERVAL)
+            cutoff = time.monotonic() - settings.SESSION_MAX_AGE
+            for session_id, touched in list(self.last_touch.items()):
+                if (
+                    touched < cutoff
+                    and session_id not in self.request_callbacks
+                    and session_id not in self.pending_by_session
+                ):
+                    self.drop_session(session_id)
+
+    def start_gc(self):
+        """Start the idle-session sweep."""
+        if self._gc_task is None:
+            self._gc_task = asyncio.create_task(self._gc_loop())
+
+    def stop_gc(self):
+        """Stop the idle-session sweep."""
+        if self._gc_task is not None:
+            self._gc_task.cancel()
+            self._gc_task = None
+
     def get_pending_requests(self, session_id: str) -> list[PermissionRequest]:
         """Get all pending requests for a session."""
         return [
-            r for r in self.pending_requests.values()
-            if r.session_id == session_id
+            self.pending_requests[request_id]
+            for request_id in self.pending_by_session.get(session_id, ())
         ]
 
 
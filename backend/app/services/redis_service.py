@@ -0,0 +1,26 @@
+"""Redis client shared by all workers for cross-process state."""
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.config import settings
+
+__all__ = ["RedisError", "close_redis", "get_redis", "redis_client"]
+
+# Connections are opened lazily on first command. Short timeouts so an
+# unreachable server fails fast: callers treat RedisError as "no cache"
+# (or a 503 where Redis is required)
+redis_client: Redis = Redis.from_url(
+    settings.REDIS_URL,
+    socket_connect_timeout=2,
+    socket_timeout=2,
+)
+
+
+async def get_redis() -> Redis:
+    """Dependency to get the shared Redis client."""
+    return redis_client
+
+
+async def close_redis():
+    """Close the Redis connection pool."""
+    await redis_client.aclose()
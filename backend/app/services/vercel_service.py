@@ -3,18 +3,28 @@ import asyncio
 from typing import Optional
 
 import httpx
+import orjson
 
 from app.config import settings
+from app.services.http_service import http_client
 
 
 class VercelService:
     """Handles Vercel API integration."""
 
     BASE_URL = "https://api.vercel.com"
+    MAX_POLL_INTERVAL = 10  # Seconds; wait_for_deployment backs off up to this
 
-    def __init__(self, token: Optional[str] = None, team_id: Optional[str] = None):
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        team_id: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
         self.token = token or settings.VERCEL_TOKEN
         self.team_id = team_id or settings.VERCEL_TEAM_ID
+        # Keep-alive (HTTP/2) connections shared with the other API services
+        self.client = client or http_client
 
     def _headers(self) -> dict:
         return {
@@ -37,35 +47,33 @@ class VercelService:
         if not self.token:
             return []
 
-        async with httpx.AsyncClient() as client:
-            params = self._params()
-            params["limit"] = limit
-            if project_id:
-                params["projectId"] = project_id
+        params = self._params()
+        params["limit"] = limit
+        if project_id:
+            params["projectId"] = project_id
 
-            response = await client.get(
-                f"{self.BASE_URL}/v6/deployments",
-                headers=self._headers(),
-                params=params,
-            )
+        response = await self.client.get(
+            f"{self.BASE_URL}/v6/deployments",
+            headers=self._headers(),
+            params=params,
+        )
 
-            response.raise_for_status()
-            return response.json().get("deployments", [])
+        response.raise_for_status()
+        return orjson.loads(response.content).get("deployments", [])
 
     async def get_deployment(self, deployment_id: str) -> dict:
         """Get deployment details."""
         if not self.token:
             return {}
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/v13/deployments/{deployment_id}",
-                headers=self._headers(),
-                params=self._params(),
-            )
+        response = await self.client.get(
+            f"{self.BASE_URL}/v13/deployments/{deployment_id}",
+            headers=self._headers(),
+            params=self._params(),
+        )
 
-            response.raise_for_status()
-            return response.json()
+        response.raise_for_status()
+        return orjson.loads(response.content)
 
     async def get_preview_url_for_branch(
         self,
@@ -85,15 +93,26 @@ class VercelService:
         if not self.token:
             return None
 
-        deployments = await self.list_deployments(project_id=project_id, limit=50)
-
-        for deployment in deployments:
-            meta = deployment.get("meta", {})
-            if meta.get("githubCommitRef") == branch:
-                if deployment.get("state") == "READY":
-                    return f"https://{deployment['url']}"
-
-        return None
+        # Let Vercel filter by branch and state rather than scanning a page here
+        params = self._params()
+        params.update({
+            "projectId": project_id,
+            "meta-githubCommitRef": branch,
+            "state": "READY",
+            "limit": 1,
+        })
+
+        response = await self.client.get(
+            f"{self.BASE_URL}/v6/deployments",
+            headers=self._headers(),
+            params=params,
+        )
+        response.raise_for_status()
+
+        deployments = orjson.loads(response.content).get("deployments", [])
+        if not deployments:
+            return None
+        return f"https://{deployments[0]['url']}"
 
     async def wait_for_deployment(
         self,
@@ -107,7 +126,8 @@ class VercelService:
         Args:
             deployment_id: Deployment ID
             timeout: Max wait time in seconds
-            poll_interval: Time between checks in seconds
+            poll_interval: Time before the first re-check in seconds; later
+                checks back off exponentially up to MAX_POLL_INTERVAL
 
         Returns:
             Deployment data when ready
@@ -120,6 +140,8 @@ class VercelService:
             raise ValueError("Vercel token not configured")
 
         elapsed = 0
+        interval = poll_interval
+        max_interval = max(poll_interval, self.MAX_POLL_INTERVAL)
         while elapsed < timeout:
             deployment = await self.get_deployment(deployment_id)
             state = deployment.get("state")
@@ -129,8 +151,9 @@ class VercelService:
             elif state in ("ERROR", "CANCELED"):
                 raise Exception(f"Deployment failed with state: {state}")
 
-            await asyncio.sleep(poll_interval)
-            elapsed += poll_interval
+            await asyncio.sleep(interval)
+            elapsed += interval
+            interval = min(interval * 2, max_interval)
 
         raise TimeoutError(f"Deployment did not complete within {timeout} seconds")
 